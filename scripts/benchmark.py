@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+
+"""Benchmark ECW Status Line refresh latency and memory.
+
+Generates synthetic stdin payloads, transcripts and git repositories, runs
+the status line against them and reports latency percentiles and peak RSS
+as JSON, so results from two releases can be compared.
+
+Each scenario is measured on up to three paths:
+    cold     one-shot process with an empty cache dir (first refresh)
+    cached   one-shot process with warm caches (steady state)
+    daemon   `--client` process talking to a warm `--daemon` (Unix only)
+
+Usage:
+    python3 scripts/benchmark.py                      # full matrix (slow: 1 GB transcript)
+    python3 scripts/benchmark.py --quick              # small matrix for a quick check
+    python3 scripts/benchmark.py --output new.json --compare old.json
+
+Exit codes:
+    0: Benchmark completed (and no regression against --compare)
+    1: Benchmark failed, or p95 regressed beyond --threshold
+
+Fixtures are generated in --work-dir (a temporary directory by default) and
+reused when that directory is given again, since large transcripts and
+repositories take a while to build. The status line runs from a copy of
+statusline.py with HOME pointed into the work dir, so the real ~/.claude
+config, state and caches are never read or written.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+PATHS = ("cold", "cached", "daemon")
+
+FULL_TRANSCRIPT_SIZES = "1M,10M,100M,1G"
+FULL_REPO_SIZES = "10,1000,10000,100000"
+QUICK_TRANSCRIPT_SIZES = "1M,10M"
+QUICK_REPO_SIZES = "10,1000"
+
+_SIZE_SUFFIXES = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+# Tool calls cycled through when generating transcripts
+_TOOLS = ("Read", "Edit", "Bash", "Grep", "Glob", "Write", "Task")
+
+
+def get_project_root() -> Path:
+    """Get the project root directory."""
+    return Path(__file__).parent.parent
+
+
+def read_statusline_version() -> str:
+    """Read __version__ from statusline.py without importing it."""
+    for line in (get_project_root() / "statusline.py").read_text(encoding="utf-8").splitlines():
+        if line.startswith("__version__"):
+            return line.split("=", 1)[1].strip().strip('"')
+    return "unknown"
+
+
+def parse_size(text: str) -> int:
+    """Parse a byte size such as 512K, 10M or 1G."""
+    text = text.strip().upper()
+    multiplier = _SIZE_SUFFIXES.get(text[-1:], 1)
+    number = text[:-1] if text[-1:] in _SIZE_SUFFIXES else text
+    return int(float(number) * multiplier)
+
+
+def parse_list(text: str) -> list[str]:
+    """Split a comma-separated option, dropping empty items."""
+    return [item.strip() for item in text.split(",") if item.strip()]
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+
+def make_payload(
+    transcript_path: str = "", cwd: str = "", session_id: str = "bench-session"
+) -> dict[str, Any]:
+    """Build a realistic Claude Code status line payload."""
+    cwd = cwd or tempfile.gettempdir()
+    return {
+        "hook_event_name": "Status",
+        "session_id": session_id,
+        "transcript_path": transcript_path,
+        "cwd": cwd,
+        "version": "1.0.80",
+        "model": {"id": "claude-sonnet-4-20250514", "display_name": "Sonnet"},
+        "workspace": {"current_dir": cwd, "project_dir": cwd},
+        "output_style": {"name": "default"},
+        "cost": {
+            "total_cost_usd": 1.87,
+            "total_duration_ms": 1_800_000,
+            "total_api_duration_ms": 240_000,
+            "total_lines_added": 412,
+            "total_lines_removed": 96,
+        },
+        "context_window": {
+            "total_input_tokens": 98_000,
+            "total_output_tokens": 21_000,
+            "context_window_size": 200_000,
+            "current_usage": {
+                "input_tokens": 42_000,
+                "output_tokens": 3_100,
+                "cache_creation_input_tokens": 9_000,
+                "cache_read_input_tokens": 61_000,
+            },
+        },
+        "exceeds_200k_tokens": False,
+    }
+
+
+def _transcript_turn(index: int) -> str:
+    """One assistant tool call plus its tool result, as JSONL."""
+    tool = _TOOLS[index % len(_TOOLS)]
+    timestamp = f"2026-01-01T00:{(index // 60) % 60:02d}:{index % 60:02d}.000Z"
+    assistant = {
+        "type": "assistant",
+        "timestamp": timestamp,
+        "message": {
+            "role": "assistant",
+            "content": [
+                {"type": "text", "text": f"Step {index}: inspecting the code."},
+                {
+                    "type": "tool_use",
+                    "id": f"toolu_{index:08d}",
+                    "name": tool,
+                    "input": {"file_path": f"/repo/src/module_{index % 97}.py", "limit": 200},
+                },
+            ],
+        },
+        "usage": {"input_tokens": 1200 + index % 500, "output_tokens": 80 + index % 40},
+    }
+    result = {
+        "type": "user",
+        "timestamp": timestamp,
+        "message": {
+            "role": "user",
+            "content": [
+                {
+                    "type": "tool_result",
+                    "tool_use_id": f"toolu_{index:08d}",
+                    "content": "    def handler(self, event):\n        return event\n" * 12,
+                }
+            ],
+        },
+        "usage": {"input_tokens": 300 + index % 200, "output_tokens": 0},
+    }
+    return json.dumps(assistant) + "\n" + json.dumps(result) + "\n"
+
+
+def make_transcript(path: Path, size: int) -> Path:
+    """Write a transcript of at least `size` bytes (reused if present)."""
+    if path.exists() and path.stat().st_size >= size:
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    index = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < size:
+            chunk = "".join(_transcript_turn(index + i) for i in range(100))
+            f.write(chunk)
+            written += len(chunk.encode("utf-8"))
+            index += 100
+    return path
+
+
+def _git(repo: Path, *args: str) -> None:
+    subprocess.run(
+        [
+            "git",
+            "-c",
+            "user.name=bench",
+            "-c",
+            "user.email=bench@example.com",
+            "-c",
+            "commit.gpgsign=false",
+            *args,
+        ],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+    )
+
+
+def make_repo(path: Path, file_count: int) -> Path:
+    """Create a git repo with file_count committed files and a few edits."""
+    marker = path / ".bench-complete"
+    if marker.exists():
+        return path
+    if path.exists():
+        shutil.rmtree(path)
+    path.mkdir(parents=True)
+    _git(path, "init", "-q")
+    _git(path, "symbolic-ref", "HEAD", "refs/heads/bench-branch")
+
+    # Spread files over directories the way real trees are, ~100 per dir
+    for i in range(file_count):
+        directory = path / f"pkg{i // 100:04d}"
+        if i % 100 == 0:
+            directory.mkdir()
+        (directory / f"file{i:06d}.txt").write_text(f"line {i}\n", encoding="utf-8")
+    _git(path, "add", "-A")
+    _git(path, "commit", "-q", "-m", "bench fixture")
+
+    # A realistic dirty tree: a few modified and untracked files
+    for i in range(min(file_count, 3)):
+        (path / f"pkg{i // 100:04d}" / f"file{i:06d}.txt").write_text("edit\n", encoding="utf-8")
+    (path / "untracked.txt").write_text("new\n", encoding="utf-8")
+    marker.write_text("", encoding="utf-8")
+    return path
+
+
+# =============================================================================
+# MEASUREMENT
+# =============================================================================
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty sample list."""
+    ordered = sorted(samples)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def _maxrss_kb(ru_maxrss: int) -> int:
+    """Normalise ru_maxrss to KiB (macOS reports bytes, Linux KiB)."""
+    return ru_maxrss // 1024 if sys.platform == "darwin" else ru_maxrss
+
+
+def run_once(cmd: list[str], payload: str, env: dict[str, str]) -> tuple[float, int | None]:
+    """Run one refresh; returns (wall ms, peak RSS KiB or None)."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=env,
+    )
+    process.stdin.write(payload.encode("utf-8"))
+    process.stdin.close()
+    output = process.stdout.read()
+    process.stdout.close()
+    rss = None
+    if hasattr(os, "wait4"):
+        # wait4 gives this child's own rusage; RUSAGE_CHILDREN is cumulative
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        rss = _maxrss_kb(usage.ru_maxrss)
+    else:
+        process.wait()
+    elapsed = (time.perf_counter() - start) * 1000
+    if process.returncode != 0 or not output.strip():
+        raise RuntimeError(f"status line failed (exit {process.returncode}): {cmd}")
+    return elapsed, rss
+
+
+def _process_peak_rss_kb(pid: int) -> int | None:
+    """Peak RSS of a running process from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def summarize(samples: list[float], rss: list[int]) -> dict[str, Any]:
+    """Latency percentiles (ms) and peak RSS (KiB) for one scenario/path."""
+    return {
+        "runs": len(samples),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "peak_rss_kb": max(rss) if rss else None,
+    }
+
+
+class Harness:
+    """Runs scenarios against an isolated copy of statusline.py."""
+
+    def __init__(self, work_dir: Path, runs: int) -> None:
+        self.work_dir = work_dir
+        self.runs = runs
+        self.install_dir = work_dir / "install"
+        self.home = work_dir / "home"
+        self.install_dir.mkdir(parents=True, exist_ok=True)
+        (self.home / ".claude").mkdir(parents=True, exist_ok=True)
+        self.script = self.install_dir / "statusline.py"
+        shutil.copy2(get_project_root() / "statusline.py", self.script)
+
+        self.env = os.environ.copy()
+        self.env["HOME"] = str(self.home)
+        self.env["PYTHONUTF8"] = "1"
+        for var in ("ECW_DEBUG", "ECW_PROFILE", "ECW_DAEMON_SOCKET", "CLAUDE_PLUGIN_ROOT"):
+            self.env.pop(var, None)
+
+    def write_config(self, cache_dir: Path) -> None:
+        """Enable every segment that does real work; Jerry is left out."""
+        config = {
+            "tools": {"enabled": True, "cache_ttl_seconds": 0},
+            "git": {"cache_ttl_seconds": 30},
+            "jerry": {"enabled": False},
+            "display": {"auto_compact_width": 0},
+            "compaction": {"state_file": str(self.home / ".claude" / "ecw-state.json")},
+            "advanced": {"cache_dir": str(cache_dir)},
+        }
+        config_path = self.install_dir / "ecw-statusline-config.json"
+        config_path.write_text(json.dumps(config), encoding="utf-8")
+
+    def one_shot(self, args: list[str] | None = None) -> list[str]:
+        return [sys.executable, str(self.script), *(args or [])]
+
+    def measure_cold(self, payload: str) -> dict[str, Any]:
+        samples: list[float] = []
+        rss: list[int] = []
+        for i in range(self.runs):
+            cache_dir = self.work_dir / "cache-cold" / str(i)
+            self.write_config(cache_dir)
+            elapsed, peak = run_once(self.one_shot(), payload, self.env)
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            samples.append(elapsed)
+            if peak is not None:
+                rss.append(peak)
+        return summarize(samples, rss)
+
+    def measure_cached(self, payload: str) -> dict[str, Any]:
+        cache_dir = self.work_dir / "cache-warm"
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        self.write_config(cache_dir)
+        run_once(self.one_shot(), payload, self.env)  # warm up
+        samples: list[float] = []
+        rss: list[int] = []
+        for _ in range(self.runs):
+            elapsed, peak = run_once(self.one_shot(), payload, self.env)
+            samples.append(elapsed)
+            if peak is not None:
+                rss.append(peak)
+        return summarize(samples, rss)
+
+    def measure_daemon(self, payload: str) -> dict[str, Any] | None:
+        import socket
+
+        if not hasattr(socket, "AF_UNIX"):
+            return None
+        cache_dir = self.work_dir / "cache-daemon"
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        self.write_config(cache_dir)
+        env = dict(self.env)
+        # AF_UNIX paths are short (~104 bytes); keep the socket near /tmp
+        socket_dir = tempfile.mkdtemp(prefix="ecw-bench-")
+        env["ECW_DAEMON_SOCKET"] = os.path.join(socket_dir, "ecw.sock")
+
+        daemon = subprocess.Popen(
+            self.one_shot(["--daemon"]),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=env,
+        )
+        try:
+            for _ in range(200):
+                if os.path.exists(env["ECW_DAEMON_SOCKET"]):
+                    break
+                time.sleep(0.05)
+            else:
+                raise RuntimeError("daemon did not create its socket")
+
+            client = self.one_shot(["--client"])
+            run_once(client, payload, env)  # warm up
+            samples: list[float] = []
+            rss: list[int] = []
+            for _ in range(self.runs):
+                elapsed, peak = run_once(client, payload, env)
+                samples.append(elapsed)
+                if peak is not None:
+                    rss.append(peak)
+            result = summarize(samples, rss)
+            result["daemon_peak_rss_kb"] = _process_peak_rss_kb(daemon.pid)
+            return result
+        finally:
+            daemon.terminate()
+            try:
+                daemon.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                daemon.kill()
+                daemon.wait()
+            shutil.rmtree(socket_dir, ignore_errors=True)
+
+    def measure(self, scenario: str, payload: dict, paths: list[str]) -> list[dict[str, Any]]:
+        """Measure one scenario on each requested path."""
+        text = json.dumps(payload)
+        results = []
+        for path in paths:
+            print(f"  {scenario} [{path}] ...", file=sys.stderr, flush=True)
+            summary = getattr(self, f"measure_{path}")(text)
+            if summary is None:
+                print(f"  {scenario} [{path}] skipped", file=sys.stderr)
+                continue
+            results.append({"scenario": scenario, "path": path, **summary})
+        return results
+
+
+# =============================================================================
+# REPORTING
+# =============================================================================
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    """List scenario/paths whose p95 grew by more than threshold (a ratio)."""
+    previous = {(r["scenario"], r["path"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result["scenario"], result["path"]))
+        if not old or not old.get("p95_ms"):
+            continue
+        ratio = result["p95_ms"] / old["p95_ms"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{result['scenario']} [{result['path']}]: "
+                f"p95 {old['p95_ms']:.1f}ms -> {result['p95_ms']:.1f}ms (+{(ratio - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def print_table(results: list[dict]) -> None:
+    """Human-readable summary on stderr (stdout carries the JSON)."""
+    print(file=sys.stderr)
+    print(
+        f"{'scenario':<22} {'path':<7} {'p50':>9} {'p95':>9} {'p99':>9} {'rss KiB':>9}",
+        file=sys.stderr,
+    )
+    for r in results:
+        rss = r["peak_rss_kb"] if r["peak_rss_kb"] is not None else "-"
+        print(
+            f"{r['scenario']:<22} {r['path']:<7} {r['p50_ms']:>9.1f} "
+            f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {rss:>9}",
+            file=sys.stderr,
+        )
+
+
+def main() -> int:
+    """Generate fixtures, run the benchmark matrix and report results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="small matrix, 10 runs")
+    parser.add_argument("--runs", type=int, help="runs per scenario and path (default 20)")
+    parser.add_argument("--transcript-sizes", help=f"default {FULL_TRANSCRIPT_SIZES}")
+    parser.add_argument("--repo-sizes", help=f"files per repo, default {FULL_REPO_SIZES}")
+    parser.add_argument("--paths", default=",".join(PATHS), help="cold,cached,daemon")
+    parser.add_argument("--work-dir", help="fixture directory (reused between runs)")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON results to check for regressions")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="allowed p95 growth vs baseline (0.2 = 20%%)"
+    )
+    args = parser.parse_args()
+
+    runs = args.runs or (10 if args.quick else 20)
+    transcript_sizes = parse_list(
+        args.transcript_sizes
+        if args.transcript_sizes is not None
+        else (QUICK_TRANSCRIPT_SIZES if args.quick else FULL_TRANSCRIPT_SIZES)
+    )
+    repo_sizes = parse_list(
+        args.repo_sizes
+        if args.repo_sizes is not None
+        else (QUICK_REPO_SIZES if args.quick else FULL_REPO_SIZES)
+    )
+    paths = parse_list(args.paths)
+    unknown = [p for p in paths if p not in PATHS]
+    if unknown or runs < 1:
+        print(f"ERROR: unknown paths {unknown} or runs < 1", file=sys.stderr)
+        return 1
+
+    own_work_dir = args.work_dir is None
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="ecw-bench-")).resolve()
+    work_dir.mkdir(parents=True, exist_ok=True)
+    results: list[dict[str, Any]] = []
+
+    try:
+        harness = Harness(work_dir, runs)
+        empty_dir = work_dir / "empty"
+        empty_dir.mkdir(exist_ok=True)
+
+        print("Scenario: payload only", file=sys.stderr)
+        results += harness.measure("payload", make_payload(cwd=str(empty_dir)), paths)
+
+        for size in transcript_sizes:
+            print(f"Generating {size} transcript", file=sys.stderr)
+            transcript = make_transcript(
+                work_dir / "transcripts" / f"{size}.jsonl", parse_size(size)
+            )
+            payload = make_payload(transcript_path=str(transcript), cwd=str(empty_dir))
+            results += harness.measure(f"transcript-{size}", payload, paths)
+
+        if repo_sizes and shutil.which("git") is None:
+            print("git not found, skipping repository scenarios", file=sys.stderr)
+            repo_sizes = []
+        for count in repo_sizes:
+            print(f"Generating {count}-file repository", file=sys.stderr)
+            repo = make_repo(work_dir / "repos" / f"files-{count}", int(count))
+            results += harness.measure(f"repo-{count}", make_payload(cwd=str(repo)), paths)
+
+    except (OSError, RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if own_work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "version": read_statusline_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "runs": runs,
+        "results": results,
+    }
+    print_table(results)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline.get("results", []), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION: {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
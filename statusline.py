@@ -29,6 +29,11 @@ Installation:
          }
        }
 
+Daemon mode (optional, Unix only):
+    Run `python3 ~/.claude/statusline.py --daemon` once, then use
+    `python3 ~/.claude/statusline.py --client` as the statusLine command.
+    The client falls back to in-process rendering if no daemon is running.
+
 Configuration:
     Optional: Create ~/.claude/ecw-statusline-config.json to override defaults.
     See DEFAULT_CONFIG below for all available options.
@@ -36,15 +41,20 @@ Configuration:
 
 from __future__ import annotations
 
+# Startup cost is paid on every refresh, so only cheap modules are imported
+# at module level (json pulls in re and functools anyway). subprocess,
+# threading, hashlib, etc. are imported by the functions that need them, and
+# pathlib/tempfile are avoided entirely (see run_import_budget_test).
+import contextvars
+import functools
 import json
 import os
 import re
-import subprocess
 import sys
-import tempfile
-from datetime import datetime
-from pathlib import Path
-from typing import Any
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
 
 # =============================================================================
 # VERSION
@@ -85,6 +95,7 @@ DEFAULT_CONFIG: dict[str, Any] = {
         "session": True,  # Now shows duration + total tokens
         "compaction": True,  # NEW: Shows token delta after compaction
         "tools": True,
+        "sub_agents": True,
         "git": True,
         "directory": True,
     },
@@ -115,6 +126,9 @@ DEFAULT_CONFIG: dict[str, Any] = {
         "detection_threshold": 10000,
         # State file for tracking previous token counts
         "state_file": "~/.claude/ecw-statusline-state.json",
+        # Append the session's compaction count, average tokens reclaimed
+        # and time since the last one (standalone detection only)
+        "show_summary": True,
     },
     # Tools segment settings
     "tools": {
@@ -122,6 +136,21 @@ DEFAULT_CONFIG: dict[str, Any] = {
         "top_n": 3,
         "min_tokens": 100,
         "cache_ttl_seconds": 5,
+        # Lines longer than this are measured in a streaming pass instead
+        # of being decoded, bounding memory per line (0 = no limit)
+        "max_line_bytes": 1048576,
+        # Only count the last N turns and/or minutes (0 = whole session)
+        "window": {"turns": 0, "minutes": 0},
+        # Parse at least this many unindexed MB in parallel chunks (0 disables)
+        "parallel_ingest_mb": 64,
+        "parallel_workers": 0,  # 0 = one per CPU
+    },
+    # Sub-agent transcripts found beside the session transcript (used when
+    # Jerry does not report sub-agents)
+    "sub_agents": {
+        "enabled": False,  # Disabled by default (requires transcript parsing)
+        # A sub-agent whose transcript changed this recently counts as active
+        "active_seconds": 60,
     },
     # Git settings
     "git": {
@@ -129,6 +158,9 @@ DEFAULT_CONFIG: dict[str, Any] = {
         "show_status": True,
         "show_uncommitted_count": True,
         "max_branch_length": 20,
+        # Reuse the last result while .git/HEAD, .git/index and the work tree
+        # root are unchanged, for at most this long (0 disables the cache)
+        "cache_ttl_seconds": 30,
     },
     # Directory settings
     "directory": {
@@ -159,28 +191,196 @@ DEFAULT_CONFIG: dict[str, Any] = {
         "enabled": True,  # Try calling jerry context estimate for domain data
         "command": "",  # Override command; empty = auto-detect via CLAUDE_PLUGIN_ROOT
         "timeout": 3,  # Timeout in seconds for jerry subprocess
+        # Run the project venv's `jerry` script directly once `uv run` has
+        # synced it, until installed_plugins.json/pyproject.toml/uv.lock change
+        "direct_launch": True,
+        # --daemon only: keep one Jerry process alive and stream payloads to it
+        # as JSON lines instead of starting `jerry context estimate` per refresh
+        "worker": False,
+        "worker_command": "",  # Override; empty = estimate command + "--stream"
+        "worker_idle_seconds": 300,  # Stop the worker after this long unused
     },
     # Advanced settings
     "advanced": {
         "handle_cumulative_bug": True,
         "git_timeout": 2,
+        # Upper bound (ms) on waiting for Jerry/git/transcript work; sources
+        # that miss it render from their last value, marked stale (0 = off)
+        "latency_budget_ms": 0,
         "debug": False,
+        # Directory for persistent caches (transcript checkpoints, etc.)
+        "cache_dir": "~/.claude/ecw-statusline-cache",
     },
 }
 
+# =============================================================================
+# PROFILING
+# =============================================================================
+
+# Profile of the refresh being rendered in this context, if profiling is on.
+# A context variable (rather than a global) keeps concurrent daemon requests
+# apart; _BackgroundTask copies the context into its worker thread.
+_current_profile: contextvars.ContextVar[_Profile | None] = contextvars.ContextVar(
+    "ecw_profile", default=None
+)
+
+
+class _Profile:
+    """Wall-time record of one refresh, written as JSON by finish_profile()."""
+
+    def __init__(self, mode: str, target: str) -> None:
+        import threading
+        import time
+
+        self.mode = mode
+        self.target = target
+        self.stages: list[dict[str, Any]] = []
+        self.counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def record(self, name: str, start: float, end: float) -> None:
+        """Record one stage; start/end are time.perf_counter() values."""
+        import threading
+
+        stage = {
+            "stage": name,
+            "start_ms": round((start - self._origin) * 1000, 3),
+            "ms": round((end - start) * 1000, 3),
+            "thread": threading.current_thread().name,
+        }
+        with self._lock:
+            self.stages.append(stage)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Increment a named counter (e.g. cache hits)."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-serialisable summary of the refresh."""
+        import time
+        from datetime import datetime
+
+        with self._lock:
+            return {
+                "version": __version__,
+                "mode": self.mode,
+                "pid": os.getpid(),
+                "time": datetime.now().isoformat(timespec="milliseconds"),
+                "total_ms": round((time.perf_counter() - self._origin) * 1000, 3),
+                "stages": list(self.stages),
+                "counters": dict(self.counters),
+            }
+
+
+def _profile_target() -> str | None:
+    """Where profiles go: "-" for stderr, a file path, or None when off.
+
+    `--profile` or ECW_PROFILE=1 writes to stderr; `--profile=PATH` or
+    ECW_PROFILE=PATH appends one JSON object per line to PATH.
+    """
+    for arg in sys.argv[1:]:
+        if arg == "--profile":
+            return "-"
+        if arg.startswith("--profile="):
+            return arg.split("=", 1)[1] or "-"
+    env = os.environ.get("ECW_PROFILE", "")
+    if env in ("", "0"):
+        return None
+    return "-" if env == "1" else env
+
+
+def start_profile(mode: str) -> tuple[_Profile, Any] | None:
+    """Start profiling one refresh in the current context, if enabled."""
+    target = _profile_target()
+    if target is None:
+        return None
+    profile = _Profile(mode, target)
+    return profile, _current_profile.set(profile)
+
+
+def finish_profile(handle: tuple[_Profile, Any] | None) -> None:
+    """Stop profiling and write the profile to its target."""
+    if handle is None:
+        return
+    profile, token = handle
+    _current_profile.reset(token)
+    line = json.dumps(profile.to_dict(), separators=(",", ":"))
+    if profile.target == "-":
+        print(line, file=sys.stderr)
+        return
+    try:
+        with open(os.path.expanduser(profile.target), "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        debug_log(f"Profile write failed: {e}")
+
+
+class profile_stage:
+    """Context manager timing a stage of the current profile (no-op if off)."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._profile = _current_profile.get()
+        self._start = 0.0
+
+    def __enter__(self) -> profile_stage:
+        if self._profile is not None:
+            import time
+
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._profile is not None:
+            import time
+
+            self._profile.record(self.name, self._start, time.perf_counter())
+
+
+def profile_count(name: str, amount: int = 1) -> None:
+    """Increment a counter on the current profile (no-op if off)."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.count(name, amount)
+
+
+def _profiled(name: str) -> Any:
+    """Decorator timing every call of a function as stage `name`."""
+
+    def decorate(func: Any) -> Any:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _current_profile.get() is None:
+                return func(*args, **kwargs)
+            with profile_stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
 # =============================================================================
 # CONFIGURATION LOADING
 # =============================================================================
 
 
-def _get_config_paths() -> list[Path]:
+def _home_dir() -> str | None:
+    """The user's home directory, or None if HOME cannot be resolved."""
+    home = os.path.expanduser("~")
+    # expanduser() returns "~" unchanged when it cannot find a home directory
+    return None if home == "~" else home
+
+
+def _get_config_paths() -> list[str]:
     """Get config file search paths, handling missing HOME gracefully."""
-    paths = [Path(__file__).parent / "ecw-statusline-config.json"]
-    try:
-        paths.append(Path.home() / ".claude" / "ecw-statusline-config.json")
-    except (RuntimeError, KeyError, OSError):
-        # HOME not set or not resolvable (e.g., minimal Docker container, Windows CI)
-        pass
+    paths = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "ecw-statusline-config.json")]
+    home = _home_dir()
+    # HOME not set or not resolvable (e.g., minimal Docker container, Windows CI)
+    if home is not None:
+        paths.append(os.path.join(home, ".claude", "ecw-statusline-config.json"))
     return paths
 
 
@@ -188,6 +388,116 @@ CONFIG_PATHS = _get_config_paths()
 
 _transcript_cache: dict[str, tuple[float, dict[str, int]]] = {}
 
+# Compaction state store: a header, then one fixed-size record per session.
+# Bump the version when the layout changes; a store with another version (or
+# written for another config schema_version) is reset
+_STATE_STORE_VERSION = 2
+_STATE_STORE_MAGIC = b"ECWS"
+_STATE_HEADER_FORMAT = "<4sI8s"  # magic, store version, config schema_version
+_STATE_HEADER_SIZE = 16
+# key, previous context, last from/to, updated, then the compaction summary:
+# count, total tokens reclaimed, time of the last one and its event number
+_STATE_RECORD_FORMAT = "<48sqqqdqqdq"
+_STATE_RECORD_SIZE = 112
+_STATE_KEY_BYTES = 48
+# Records of sessions not refreshed for this long are reused for new sessions
+_STATE_RETENTION_SECONDS = 30 * 86400
+# An unchanged record is rewritten only when older than this, so a live
+# session's record never ages out
+_STATE_TOUCH_SECONDS = 86400
+# The store's write lock is one byte past any record: Windows locks are
+# mandatory, so locking a byte that is read would block readers
+_STATE_LOCK_OFFSET = 1 << 40
+
+# Compaction event log: a header, then one fixed-size event per compaction.
+# Events are numbered from 1; the header holds the number of the first event
+# kept, so an event's offset follows from its number
+_COMPACTION_LOG_MAGIC = b"ECWC"
+_COMPACTION_LOG_VERSION = 1
+_COMPACTION_LOG_HEADER_FORMAT = "<4sIq"  # magic, version, number of the first event
+_COMPACTION_LOG_HEADER_SIZE = 16
+# key, time, from/to tokens, model, number of the session's previous event
+_COMPACTION_EVENT_FORMAT = "<48sdqq32sq"
+_COMPACTION_EVENT_SIZE = 112
+# When the log holds this many events, the oldest half is dropped
+_COMPACTION_LOG_MAX_EVENTS = 1024
+
+# Bump when the transcript index schema or parsing semantics change; an index
+# with another version is dropped and rebuilt from the transcripts
+_TRANSCRIPT_INDEX_VERSION = 5
+
+_TRANSCRIPT_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    path TEXT PRIMARY KEY,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    head_crc INTEGER NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    path TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    tail_crc INTEGER NOT NULL,
+    totals TEXT NOT NULL,
+    PRIMARY KEY (path, offset)
+);
+CREATE TABLE IF NOT EXISTS tool_totals (
+    path TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    PRIMARY KEY (path, tool)
+);
+CREATE TABLE IF NOT EXISTS turns (
+    path TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    ts REAL,
+    role TEXT,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    PRIMARY KEY (path, offset)
+);
+CREATE INDEX IF NOT EXISTS turns_ts ON turns (path, ts);
+CREATE TABLE IF NOT EXISTS sidechains (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    session_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sidechain_dirs (
+    dir TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+# Only transcript lines containing one of these JSON strings can contribute
+# to tool totals (see _extract_tool_usage); others are skipped undecoded.
+# One regex pass is faster than three separate `in` scans per line.
+_TRANSCRIPT_MARKER_RE = re.compile(rb'"(?:tool_use|tool_result|usage)"')
+
+# Transcripts are scanned through read-only mmap windows of this size, so the
+# working set stays bounded however large the transcript grows
+_TRANSCRIPT_MMAP_WINDOW = 1 << 20
+
+# Oversized lines (tools.max_line_bytes) are read as a skeleton in which
+# strings longer than this are replaced by a length marker
+_TRANSCRIPT_LONG_STRING = 1024
+_SKELETON_STOP_RE = re.compile(rb'["\n]')
+# Body of a JSON string up to its closing quote, a newline or the end of the
+# buffer; a trailing backslash is left for the next read
+_JSON_STRING_BODY_RE = re.compile(rb'[^"\\\n]*(?:\\[^\n][^"\\\n]*)*')
+# The body regex is applied to spans of at most this many bytes: its
+# repetition allocates backtracking state per escape sequence
+_JSON_STRING_SPAN = 16384
+# Every byte except UTF-8 continuation bytes, which do not start a character
+_UTF8_NON_CONTINUATION = bytes(range(0x80)) + bytes(range(0xC0, 0x100))
+_SIZED_STRING_MARK = "\ue000"
+
+# The index fingerprints a transcript by CRCs of this many bytes at its start
+# and just before each checkpoint offset, and keeps this many checkpoints
+_TRANSCRIPT_FINGERPRINT_BYTES = 4096
+_TRANSCRIPT_CHECKPOINTS = 8
+
 
 def _schema_version_mismatch(found_version: Any) -> bool:
     """Check whether a found schema version differs from the expected version.
@@ -213,12 +523,85 @@ def _schema_version_mismatch(found_version: Any) -> bool:
         return True
 
 
+@_profiled("config.load")
 def load_config() -> dict[str, Any]:
-    """Load configuration from embedded defaults with optional file override."""
+    """Load configuration from embedded defaults with optional file override.
+
+    The merged result is cached as a snapshot keyed by _config_signature(),
+    so the common path is a few stats and one small read instead of probing,
+    parsing and merging every candidate file.
+    """
+    signature = _config_signature()
+    snapshot_path = _config_snapshot_path()
+
+    if snapshot_path is not None:
+        try:
+            with open(snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if (
+                isinstance(snapshot, dict)
+                and snapshot.get("signature") == signature
+                and isinstance(snapshot.get("config"), dict)
+            ):
+                return snapshot["config"]
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            debug_log(f"Config snapshot load error: {e}")
+
+    config = _load_config_files()
+
+    if snapshot_path is not None:
+        try:
+            _atomic_write_json(snapshot_path, {"signature": signature, "config": config})
+        except OSError as e:
+            debug_log(f"Config snapshot save failed: {e}")
+
+    return config
+
+
+def _config_signature() -> list[Any]:
+    """Everything load_config()'s result depends on.
+
+    The script version and path, plus [mtime_ns, size, inode] (or None when
+    missing) of this file and of every CONFIG_PATHS candidate, so creating,
+    editing or deleting any of them changes the signature. Long-running
+    modes compare it to decide when to reload.
+    """
+    script = os.path.abspath(__file__)
+    signature: list[Any] = [__version__, script]
+    for path in [script, *CONFIG_PATHS]:
+        try:
+            st = os.stat(path)
+            signature.append([st.st_mtime_ns, st.st_size, st.st_ino])
+        except OSError:
+            signature.append(None)
+    return signature
+
+
+def _config_snapshot_path() -> str | None:
+    """Snapshot file for this install, in the default cache dir.
+
+    The default (not advanced.cache_dir) is used since reading that setting
+    requires the config. Installs are told apart by a CRC of the script path.
+    """
+    import zlib
+
+    cache_dir = _resolve_cache_dir(DEFAULT_CONFIG)
+    if cache_dir is None:
+        return None
+    script = os.path.abspath(__file__)
+    return os.path.join(
+        cache_dir, f"config-{zlib.crc32(script.encode('utf-8', 'replace')):08x}.json"
+    )
+
+
+def _load_config_files() -> dict[str, Any]:
+    """Merge the first readable CONFIG_PATHS file over DEFAULT_CONFIG."""
     config = deep_copy(DEFAULT_CONFIG)
 
     for config_path in CONFIG_PATHS:
-        if config_path.exists():
+        if os.path.exists(config_path):
             try:
                 with open(config_path, encoding="utf-8") as f:
                     user_config = json.load(f)
@@ -263,6 +646,24 @@ def deep_merge(base: dict, override: dict) -> dict:
     return result
 
 
+# Environment variables that change how a refresh renders. A --client sends
+# its values with each request, and the daemon reads them from here instead
+# of its own environment (a context variable, so concurrent requests and
+# their background tasks each see their own client's values)
+_CLIENT_ENV_VARS = ("NO_COLOR", "CLAUDE_PLUGIN_ROOT", "UV_PROJECT_ENVIRONMENT")
+_client_env: contextvars.ContextVar[dict[str, str] | None] = contextvars.ContextVar(
+    "ecw_client_env", default=None
+)
+
+
+def _getenv(name: str) -> str | None:
+    """Read an environment variable, as the requesting client sees it."""
+    client_env = _client_env.get()
+    if client_env is not None and name in _CLIENT_ENV_VARS:
+        return client_env.get(name)
+    return os.environ.get(name)
+
+
 def debug_log(message: str) -> None:
     """Log debug message to stderr and file if debug mode enabled."""
     if os.environ.get("ECW_DEBUG") == "1":
@@ -298,33 +699,218 @@ def configure_windows_console() -> None:
 # =============================================================================
 
 
-def _resolve_state_path(config: dict) -> Path | None:
+def _resolve_state_path(config: dict) -> str | None:
     """Resolve state file path, returning None if HOME is unavailable."""
     raw_path = config["compaction"]["state_file"]
     if not isinstance(raw_path, str):
         debug_log(f"Invalid state_file config type: {type(raw_path).__name__}")
         return None
-    try:
-        return Path(os.path.expanduser(raw_path))
-    except (RuntimeError, KeyError, OSError, TypeError):
+    path = os.path.expanduser(raw_path)
+    if path.startswith("~"):
         debug_log("Cannot resolve state file path: HOME not set or invalid config")
         return None
-
-
-def load_state(config: dict) -> dict[str, Any]:
-    """Load previous state for compaction detection."""
-    default = {
+    return path
+
+
+# Compaction state is keyed by session, so sessions running in parallel never
+# overwrite each other's previous_context_tokens. It is stored next to
+# state_file (same name, ".sessions" extension) as a header followed by one
+# fixed-size record per session. A refresh reads the file once and rewrites
+# only its own record in place; the write lock is taken only to add a record
+# or reset the store, which is when two sessions could pick the same slot.
+#
+# A session without a record starts from _default_state(): the JSON state
+# file of earlier versions is shared by all sessions, so its context size is
+# not this session's and is never imported. If the store cannot be opened,
+# the JSON file is used as one shared state, as before.
+#
+# Each compaction is also appended to a log next to it (".compactions"
+# extension) holding the session, time, from/to tokens and model. The log
+# keeps the newest events only, so its size is bounded. A session's record
+# holds the running summary the segment shows (count, tokens reclaimed,
+# time of the last one), so the log is never read to render. The record also
+# holds the number of the session's last event, and each event holds the
+# number of the session's previous one, so a session's history is read
+# without scanning the log (see load_compaction_history).
+
+
+class _StateStore:
+    """An open state store and where one session's record is."""
+
+    def __init__(self, fd: int, key: bytes, state_file: str) -> None:
+        self.fd = fd
+        self.key = key
+        self.state_file = state_file
+        self.slot: int | None = None  # offset of the session's record
+        self.updated = 0.0  # when the record was last written
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def _default_state() -> dict[str, Any]:
+    return {
         "previous_context_tokens": 0,
         "last_compaction_from": 0,
         "last_compaction_to": 0,
+        "compactions": 0,
+        "reclaimed_tokens": 0,
+        "last_compaction_at": 0.0,
+        "last_event": 0,
     }
-    state_file = _resolve_state_path(config)
 
+
+def _state_session_key(data: dict) -> str:
+    """Key compaction state by session, falling back to the transcript path."""
+    return safe_get(data, "session_id", default="") or safe_get(data, "transcript_path", default="")
+
+
+def _state_record_key(session_key: str) -> bytes:
+    """Fit a session key into a record, keeping long keys distinct."""
+    raw = session_key.encode("utf-8", errors="replace")
+    if len(raw) > _STATE_KEY_BYTES:
+        import zlib
+
+        raw = b"%08x" % zlib.crc32(raw) + raw[8 - _STATE_KEY_BYTES :]
+    return raw
+
+
+def _state_store_header() -> bytes:
+    import struct
+
+    schema_version = str(DEFAULT_CONFIG["schema_version"]).encode("ascii", errors="replace")
+    return struct.pack(
+        _STATE_HEADER_FORMAT, _STATE_STORE_MAGIC, _STATE_STORE_VERSION, schema_version
+    )
+
+
+def _open_state_store(config: dict, session_key: str) -> _StateStore | None:
+    """Open the per-session state store, creating its file as needed.
+
+    Returns None when the state path or file is unavailable (callers then
+    use the JSON state file).
+    """
+    state_file = _resolve_state_path(config)
     if state_file is None:
-        return default
+        return None
+    store_path = os.path.splitext(state_file)[0] + ".sessions"
+    try:
+        parent = os.path.dirname(store_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        fd = os.open(store_path, flags, 0o600)
+    except OSError as e:
+        debug_log(f"State store unavailable: {e}")
+        return None
+    return _StateStore(fd, _state_record_key(session_key), state_file)
+
+
+def _lock_state_store(fd: int) -> None:
+    """Block until this process holds the store's write lock."""
+    if sys.platform == "win32":
+        import msvcrt
+
+        os.lseek(fd, _STATE_LOCK_OFFSET, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+    else:
+        import fcntl
+
+        fcntl.lockf(fd, fcntl.LOCK_EX, 1, _STATE_LOCK_OFFSET)
+
+
+def _unlock_state_store(fd: int) -> None:
+    if sys.platform == "win32":
+        import msvcrt
+
+        os.lseek(fd, _STATE_LOCK_OFFSET, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+
+        fcntl.lockf(fd, fcntl.LOCK_UN, 1, _STATE_LOCK_OFFSET)
+
+
+def _read_state_file(fd: int) -> bytes:
+    os.lseek(fd, 0, os.SEEK_SET)
+    chunks = []
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def _write_state_file(fd: int, offset: int, data: bytes) -> None:
+    os.lseek(fd, offset, os.SEEK_SET)
+    while data:
+        data = data[os.write(fd, data) :]
+
+
+def _state_record(key: bytes, state: dict[str, Any], now: float) -> bytes:
+    import struct
+
+    return struct.pack(
+        _STATE_RECORD_FORMAT,
+        key,
+        int(state.get("previous_context_tokens", 0)),
+        int(state.get("last_compaction_from", 0)),
+        int(state.get("last_compaction_to", 0)),
+        now,
+        int(state.get("compactions", 0)),
+        int(state.get("reclaimed_tokens", 0)),
+        float(state.get("last_compaction_at", 0.0)),
+        int(state.get("last_event", 0)),
+    )
 
+
+def _read_state_store(store: _StateStore) -> bytes:
+    """Read the whole store, resetting it first if its header is not current."""
+    header = _state_store_header()
+    data = _read_state_file(store.fd)
+    if data[:_STATE_HEADER_SIZE] == header:
+        return data
+
+    _lock_state_store(store.fd)
+    try:
+        # Checked again under the lock: another session may have just reset it
+        data = _read_state_file(store.fd)
+        if data[:_STATE_HEADER_SIZE] != header:
+            if data:
+                debug_log("State store version mismatch, resetting compaction state")
+            data = header
+            os.ftruncate(store.fd, 0)
+            _write_state_file(store.fd, 0, data)
+    finally:
+        _unlock_state_store(store.fd)
+    return data
+
+
+def _free_state_slot(data: bytes, store: _StateStore, now: float) -> int:
+    """Pick the slot for a session without a record (store lock held).
+
+    Prefers a record another process of the session just added, then a
+    record past retention, then appending.
+    """
+    import struct
+
+    expired = None
+    end = _STATE_HEADER_SIZE
+    while end + _STATE_RECORD_SIZE <= len(data):
+        fields = struct.unpack_from(_STATE_RECORD_FORMAT, data, end)
+        key, updated = fields[0].rstrip(b"\0"), fields[4]
+        if key == store.key:
+            return end
+        if expired is None and updated < now - _STATE_RETENTION_SECONDS:
+            expired = end
+        end += _STATE_RECORD_SIZE
+    return expired if expired is not None else end
+
+
+def _load_state_json(state_file: str) -> dict[str, Any] | None:
+    """Read a JSON state file, or None if missing, unreadable or outdated."""
     try:
-        if state_file.exists():
+        if os.path.exists(state_file):
             with open(state_file, encoding="utf-8") as f:
                 loaded = json.load(f)
             # Check schema version - fall back to defaults on mismatch
@@ -337,21 +923,75 @@ def load_state(config: dict) -> dict[str, Any]:
                     f"Discarding previous state data (compaction history "
                     f"will be reset) and falling back to defaults."
                 )
-                return default
+                return None
             return loaded
     except (json.JSONDecodeError, OSError) as e:
         debug_log(f"State load error: {e}")
+    return None
+
+
+@_profiled("state.load")
+def load_state(config: dict, store: _StateStore | None = None) -> dict[str, Any]:
+    """Load previous state for compaction detection.
+
+    Reads the session's record from store, or the shared JSON state file
+    when no store is given.
+    """
+    default = _default_state()
+    if store is None:
+        state_file = _resolve_state_path(config)
+        if state_file is None:
+            return default
+        return {**default, **(_load_state_json(state_file) or {})}
+
+    import struct
+
+    try:
+        data = _read_state_store(store)
+    except OSError as e:
+        debug_log(f"State load error: {e}")
+        return default
 
+    offset = _STATE_HEADER_SIZE
+    while offset + _STATE_RECORD_SIZE <= len(data):
+        fields = struct.unpack_from(_STATE_RECORD_FORMAT, data, offset)
+        if fields[0].rstrip(b"\0") == store.key:
+            store.slot, store.updated = offset, fields[4]
+            # The record's fields, minus key and updated, in _default_state order
+            return dict(zip(default, fields[1:4] + fields[5:]))
+        offset += _STATE_RECORD_SIZE
     return default
 
 
-def save_state(config: dict, state: dict[str, Any]) -> None:
+@_profiled("state.save")
+def save_state(config: dict, state: dict[str, Any], store: _StateStore | None = None) -> None:
     """Save current state for next invocation.
 
-    Uses atomic write pattern (write to temp file, then rename) to prevent
-    corruption from partial writes. Handles read-only filesystems and missing
-    HOME gracefully by logging a debug warning rather than crashing.
+    With a store, only the session's own record is written, in place once it
+    exists. Without one, the shared JSON state file is rewritten atomically
+    (temp file, then rename). Read-only filesystems and missing HOME are
+    logged rather than raised.
     """
+    if store is not None:
+        import time
+
+        now = time.time()
+        try:
+            if store.slot is not None:
+                _write_state_file(store.fd, store.slot, _state_record(store.key, state, now))
+                store.updated = now
+                return
+            _lock_state_store(store.fd)
+            try:
+                slot = _free_state_slot(_read_state_file(store.fd), store, now)
+                _write_state_file(store.fd, slot, _state_record(store.key, state, now))
+                store.slot, store.updated = slot, now
+            finally:
+                _unlock_state_store(store.fd)
+        except OSError as e:
+            debug_log(f"State save failed: {e}")
+        return
+
     state_file = _resolve_state_path(config)
 
     if state_file is None:
@@ -361,36 +1001,200 @@ def save_state(config: dict, state: dict[str, Any]) -> None:
     try:
         # Ensure schema_version is always written to state file
         state["schema_version"] = DEFAULT_CONFIG["schema_version"]
-        state_file.parent.mkdir(parents=True, exist_ok=True)
-        # Atomic write: write to temp file in same directory, then rename
-        fd = tempfile.NamedTemporaryFile(
-            mode="w",
-            dir=state_file.parent,
-            suffix=".tmp",
-            delete=False,
-            encoding="utf-8",
-        )
-        try:
-            json.dump(state, fd)
-            fd.close()  # Must close before os.replace on Windows
-            os.replace(fd.name, str(state_file))
-        except OSError:
-            fd.close()
-            try:
-                os.unlink(fd.name)
-            except OSError:
-                pass
-            raise
+        _atomic_write_json(state_file, state)
     except OSError as e:
         debug_log(f"State save failed: {e}")
 
 
+def _compaction_log_path(state_file: str) -> str:
+    return os.path.splitext(state_file)[0] + ".compactions"
+
+
+def _compaction_log_header(first_event: int) -> bytes:
+    import struct
+
+    return struct.pack(
+        _COMPACTION_LOG_HEADER_FORMAT, _COMPACTION_LOG_MAGIC, _COMPACTION_LOG_VERSION, first_event
+    )
+
+
+def _compaction_log_first_event(header: bytes) -> int | None:
+    """The number of the log's first event, or None if header is not current."""
+    import struct
+
+    if len(header) < _COMPACTION_LOG_HEADER_SIZE:
+        return None
+    magic, version, first_event = struct.unpack_from(_COMPACTION_LOG_HEADER_FORMAT, header)
+    if magic != _COMPACTION_LOG_MAGIC or version != _COMPACTION_LOG_VERSION:
+        return None
+    return first_event
+
+
+@_profiled("state.log_compaction")
+def _append_compaction_event(store: _StateStore, state: dict[str, Any], model: str) -> int:
+    """Append the compaction just recorded in state to the event log.
+
+    Returns the event's number, or 0 if it could not be logged. Runs under
+    the store's write lock; a full log first drops its oldest half.
+    """
+    import struct
+
+    event = struct.pack(
+        _COMPACTION_EVENT_FORMAT,
+        store.key,
+        state["last_compaction_at"],
+        state["last_compaction_from"],
+        state["last_compaction_to"],
+        model.encode("utf-8", errors="replace")[:32],
+        state.get("last_event", 0),
+    )
+    flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+    try:
+        fd = os.open(_compaction_log_path(store.state_file), flags, 0o600)
+    except OSError as e:
+        debug_log(f"Compaction log unavailable: {e}")
+        return 0
+    try:
+        _lock_state_store(store.fd)
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            first_event = _compaction_log_first_event(os.read(fd, _COMPACTION_LOG_HEADER_SIZE))
+            count = (os.fstat(fd).st_size - _COMPACTION_LOG_HEADER_SIZE) // _COMPACTION_EVENT_SIZE
+            if first_event is None:
+                # New log, or one written by another version
+                first_event, count = 1, 0
+                os.ftruncate(fd, 0)
+                _write_state_file(fd, 0, _compaction_log_header(first_event))
+            elif count >= _COMPACTION_LOG_MAX_EVENTS:
+                dropped = count - _COMPACTION_LOG_MAX_EVENTS // 2
+                kept = _read_state_file(fd)[
+                    _COMPACTION_LOG_HEADER_SIZE + dropped * _COMPACTION_EVENT_SIZE :
+                ][: (count - dropped) * _COMPACTION_EVENT_SIZE]
+                first_event, count = first_event + dropped, count - dropped
+                os.ftruncate(fd, 0)
+                _write_state_file(fd, 0, _compaction_log_header(first_event) + kept)
+                debug_log(f"Compaction log full, dropped {dropped} oldest events")
+            offset = _COMPACTION_LOG_HEADER_SIZE + count * _COMPACTION_EVENT_SIZE
+            _write_state_file(fd, offset, event)
+        finally:
+            _unlock_state_store(store.fd)
+    except OSError as e:
+        debug_log(f"Compaction log write failed: {e}")
+        return 0
+    finally:
+        os.close(fd)
+    return first_event + count
+
+
+def load_compaction_history(
+    config: dict, session_key: str, limit: int = _COMPACTION_LOG_MAX_EVENTS
+) -> list[dict[str, Any]]:
+    """A session's logged compactions, newest first (up to limit).
+
+    Follows the session's chain of event numbers from its state record, so
+    only the session's own events are read; events the log has dropped end
+    the chain.
+    """
+    import struct
+
+    store = _open_state_store(config, session_key)
+    if store is None:
+        return []
+    try:
+        number = load_state(config, store)["last_event"]
+    finally:
+        store.close()
+
+    history: list[dict[str, Any]] = []
+    try:
+        with open(_compaction_log_path(store.state_file), "rb") as f:
+            first_event = _compaction_log_first_event(f.read(_COMPACTION_LOG_HEADER_SIZE))
+            while first_event is not None and number >= first_event and len(history) < limit:
+                f.seek(
+                    _COMPACTION_LOG_HEADER_SIZE + (number - first_event) * _COMPACTION_EVENT_SIZE
+                )
+                raw = f.read(_COMPACTION_EVENT_SIZE)
+                if len(raw) < _COMPACTION_EVENT_SIZE:
+                    break
+                key, at, from_tokens, to_tokens, model, previous = struct.unpack(
+                    _COMPACTION_EVENT_FORMAT, raw
+                )
+                if key.rstrip(b"\0") != store.key or previous >= number:
+                    break
+                history.append(
+                    {
+                        "timestamp": at,
+                        "from_tokens": from_tokens,
+                        "to_tokens": to_tokens,
+                        "model": model.rstrip(b"\0").decode("utf-8", errors="ignore"),
+                    }
+                )
+                number = previous
+    except OSError as e:
+        debug_log(f"Compaction log read failed: {e}")
+    return history
+
+
+def _atomic_write_json(path: str, obj: Any) -> None:
+    """Write obj as JSON to path atomically (temp file + rename).
+
+    Creates the parent directory if needed. Raises OSError on failure after
+    removing the temp file, leaving any previous file at path intact.
+    """
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    # Atomic write: write to temp file in same directory, then rename.
+    # O_EXCL with a random name is what tempfile.NamedTemporaryFile does,
+    # without importing tempfile (and random/shutil) on every refresh.
+    tmp_path = f"{path}.{os.urandom(6).hex()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+            json.dump(obj, f)
+        # The file is closed before os.replace (required on Windows)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _resolve_cache_dir(config: dict) -> str | None:
+    """Resolve the persistent cache directory, returning None if unavailable."""
+    raw_path = config["advanced"].get("cache_dir", "")
+    if not raw_path or not isinstance(raw_path, str):
+        return None
+    path = os.path.expanduser(raw_path)
+    if path.startswith("~"):
+        debug_log("Cannot resolve cache dir: HOME not set or invalid config")
+        return None
+    return path
+
+
+def _cache_file_path(config: dict, kind: str, key: str) -> str | None:
+    """Get the cache file for a (kind, key) pair, e.g. ("git", repo_root).
+
+    The key is hashed so arbitrary paths map to safe, fixed-length names.
+    Returns None if no cache dir is available.
+    """
+    import hashlib
+
+    cache_dir = _resolve_cache_dir(config)
+    if cache_dir is None:
+        return None
+    digest = hashlib.sha256(key.encode("utf-8", errors="replace")).hexdigest()
+    return os.path.join(cache_dir, f"{kind}-{digest[:24]}.json")
+
+
 # =============================================================================
 # JERRY FRAMEWORK INTEGRATION (FEAT-002)
 # =============================================================================
 
 
-def _get_claude_config_dir() -> Path | None:
+def _get_claude_config_dir() -> str | None:
     """Get the Claude Code configuration directory (cross-platform).
 
     Returns ~/.claude on macOS/Linux, %APPDATA%/claude on Windows.
@@ -398,11 +1202,9 @@ def _get_claude_config_dir() -> Path | None:
     if sys.platform == "win32":
         appdata = os.environ.get("APPDATA", "")
         if appdata:
-            return Path(appdata) / "claude"
-    try:
-        return Path.home() / ".claude"
-    except (RuntimeError, KeyError, OSError):
-        return None
+            return os.path.join(appdata, "claude")
+    home = _home_dir()
+    return os.path.join(home, ".claude") if home is not None else None
 
 
 def _find_jerry_plugin_root() -> str | None:
@@ -417,11 +1219,12 @@ def _find_jerry_plugin_root() -> str | None:
     config_dir = _get_claude_config_dir()
     if config_dir is None:
         return None
-    registry = config_dir / "plugins" / "installed_plugins.json"
-    if not registry.exists():
+    registry = os.path.join(config_dir, "plugins", "installed_plugins.json")
+    if not os.path.exists(registry):
         return None
     try:
-        data = json.loads(registry.read_text(encoding="utf-8"))
+        with open(registry, encoding="utf-8") as f:
+            data = json.load(f)
         entries = data.get("plugins", {}).get("jerry@jerry-framework", [])
         for entry in entries:
             install_path = entry.get("installPath", "")
@@ -441,56 +1244,124 @@ def _build_jerry_command(config: dict, data: dict) -> list[str] | None:
     3. Claude Code installed plugins registry (~/.claude/plugins/installed_plugins.json)
     4. Workspace project_dir fallback
 
+    For 2-4 the project venv's console script is used directly when a valid
+    resolution is cached (see _load_jerry_resolution), else `uv run`.
+
     Returns None if Jerry is not available.
     """
     override = config.get("jerry", {}).get("command", "")
     if override:
         return override.split()
 
-    plugin_root = os.environ.get("CLAUDE_PLUGIN_ROOT", "")
+    plugin_root = _getenv("CLAUDE_PLUGIN_ROOT") or ""
     if plugin_root and os.path.isdir(plugin_root):
-        return [
-            "uv",
-            "run",
-            "--directory",
-            plugin_root,
-            "jerry",
-            "--json",
-            "context",
-            "estimate",
-        ]
+        return _jerry_project_command(config, plugin_root)
 
     # Auto-discover from Claude Code's plugin registry
     registry_root = _find_jerry_plugin_root()
     if registry_root:
-        return [
-            "uv",
-            "run",
-            "--directory",
-            registry_root,
-            "jerry",
-            "--json",
-            "context",
-            "estimate",
-        ]
+        return _jerry_project_command(config, registry_root)
 
     # Try workspace project_dir as fallback
     project_dir = safe_get(data, "workspace", "project_dir", default="")
     if project_dir and os.path.isfile(os.path.join(project_dir, "pyproject.toml")):
-        return [
-            "uv",
-            "run",
-            "--directory",
-            project_dir,
-            "jerry",
-            "--json",
-            "context",
-            "estimate",
-        ]
+        return _jerry_project_command(config, project_dir)
+
+    return None
+
+
+def _jerry_project_command(config: dict, project_dir: str) -> list[str]:
+    """Command running jerry context estimate from a project directory."""
+    resolved = _load_jerry_resolution(config, project_dir)
+    if resolved is not None:
+        return [resolved, "--json", "context", "estimate"]
+    return ["uv", "run", "--directory", project_dir, "jerry", "--json", "context", "estimate"]
+
+
+def _jerry_venv_paths(project_dir: str) -> tuple[str, str]:
+    """(interpreter, console script) paths inside the project's uv venv."""
+    # uv honours UV_PROJECT_ENVIRONMENT (relative to the project) over .venv
+    venv = os.path.join(project_dir, _getenv("UV_PROJECT_ENVIRONMENT") or ".venv")
+    if sys.platform == "win32":
+        scripts = os.path.join(venv, "Scripts")
+        return os.path.join(scripts, "python.exe"), os.path.join(scripts, "jerry.exe")
+    return os.path.join(venv, "bin", "python"), os.path.join(venv, "bin", "jerry")
+
 
+def _jerry_resolution_signature(project_dir: str) -> list[Any]:
+    """mtimes of the files whose change may require `uv run` to re-sync.
+
+    Covers the plugin registry (plugin updates move installPath), the
+    project's pyproject.toml and its uv.lock; None for a missing file.
+    """
+    config_dir = _get_claude_config_dir()
+    paths = [
+        os.path.join(config_dir, "plugins", "installed_plugins.json") if config_dir else "",
+        os.path.join(project_dir, "pyproject.toml"),
+        os.path.join(project_dir, "uv.lock"),
+    ]
+    signature: list[Any] = []
+    for path in paths:
+        try:
+            signature.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return signature
+
+
+def _load_jerry_resolution(config: dict, project_dir: str) -> str | None:
+    """Cached direct path to the project's `jerry` script, or None if invalid."""
+    if not config.get("jerry", {}).get("direct_launch", True):
+        return None
+    cache_path = _cache_file_path(config, "jerry", project_dir)
+    if cache_path is None:
+        return None
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        debug_log(f"Jerry resolution cache load error: {e}")
+        return None
+
+    interpreter, script = _jerry_venv_paths(project_dir)
+    if (
+        isinstance(cached, dict)
+        and cached.get("directory") == project_dir
+        and cached.get("interpreter") == interpreter
+        and cached.get("script") == script
+        and cached.get("signature") == _jerry_resolution_signature(project_dir)
+        and os.path.isfile(interpreter)
+        and os.access(script, os.X_OK)
+    ):
+        debug_log(f"Using cached Jerry script: {script}")
+        return script
+    debug_log("Jerry resolution cache invalid, using uv run")
     return None
 
 
+def _save_jerry_resolution(config: dict, project_dir: str) -> None:
+    """Record the project's venv script after `uv run` has synced the venv."""
+    if not config.get("jerry", {}).get("direct_launch", True):
+        return
+    cache_path = _cache_file_path(config, "jerry", project_dir)
+    interpreter, script = _jerry_venv_paths(project_dir)
+    if cache_path is None or not os.path.isfile(interpreter) or not os.access(script, os.X_OK):
+        return
+    entry = {
+        "directory": project_dir,
+        "interpreter": interpreter,
+        "script": script,
+        "signature": _jerry_resolution_signature(project_dir),
+    }
+    try:
+        _atomic_write_json(cache_path, entry)
+    except OSError as e:
+        debug_log(f"Jerry resolution cache save failed: {e}")
+
+
+@_profiled("jerry")
 def try_jerry_estimate(input_json: str, config: dict, data: dict) -> dict[str, Any] | None:
     """Try calling jerry context estimate for enhanced domain computation.
 
@@ -508,21 +1379,26 @@ def try_jerry_estimate(input_json: str, config: dict, data: dict) -> dict[str, A
 
     timeout = jerry_config.get("timeout", 3)
 
+    if jerry_config.get("worker", False) and _long_running:
+        worker = _get_jerry_worker(config, cmd)
+        if worker.ensure_running():
+            jerry_data = worker.request(data, timeout)
+            # A worker that has never answered may not support streaming at all
+            if jerry_data is not None or worker.answered:
+                return jerry_data
+            debug_log("Jerry worker has not answered yet, using one-shot command")
+        else:
+            debug_log("Jerry worker unavailable, using one-shot command")
+
+    import subprocess
+
     try:
-        # Clear VIRTUAL_ENV to prevent uv venv mismatch when the statusline
-        # runs inside a different project's activated virtualenv
-        env = {k: v for k, v in os.environ.items() if k != "VIRTUAL_ENV"}
-        result = subprocess.run(
-            cmd,
-            input=input_json,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-            env=env,
-        )
+        result = _run_source_command(cmd, timeout, input=input_json, text=True, env=_jerry_env())
         if result.returncode == 0 and result.stdout.strip():
             jerry_data = json.loads(result.stdout.strip())
             debug_log(f"Jerry response received: tier={safe_get(jerry_data, 'context', 'tier')}")
+            if cmd[:3] == ["uv", "run", "--directory"]:
+                _save_jerry_resolution(config, cmd[3])
             return jerry_data
         debug_log(f"Jerry failed: exit={result.returncode}, stderr={result.stderr[:200]}")
     except subprocess.TimeoutExpired:
@@ -535,6 +1411,207 @@ def try_jerry_estimate(input_json: str, config: dict, data: dict) -> dict[str, A
     return None
 
 
+# Set by run_daemon(): enables process-lifetime resources such as Jerry workers
+_long_running = False
+
+# Workers per (command, environment), so clients with different
+# environments never share one
+_jerry_workers: dict[tuple, _JerryWorker] = {}
+
+
+def _jerry_env() -> dict[str, str]:
+    """Environment for Jerry processes, as the requesting client would set it.
+
+    VIRTUAL_ENV is cleared to prevent a uv venv mismatch when the statusline
+    runs inside a different project's activated virtualenv. In the daemon,
+    the client's _CLIENT_ENV_VARS replace the daemon's own, including the
+    ones the client does not set.
+    """
+    env = {k: v for k, v in os.environ.items() if k != "VIRTUAL_ENV"}
+    client_env = _client_env.get()
+    if client_env is not None:
+        for name in _CLIENT_ENV_VARS:
+            env.pop(name, None)
+        env.update(client_env)
+    return env
+
+
+def _get_jerry_worker(config: dict, estimate_cmd: list[str]) -> _JerryWorker:
+    """Get (or create) the shared Jerry worker for the command and client env."""
+    jerry_config = config.get("jerry", {})
+    override = jerry_config.get("worker_command", "")
+    cmd = override.split() if override else estimate_cmd + ["--stream"]
+    idle_seconds = jerry_config.get("worker_idle_seconds", 300)
+    env = _jerry_env()
+    key = (tuple(cmd), tuple(sorted((name, env.get(name)) for name in _CLIENT_ENV_VARS)))
+
+    worker = _jerry_workers.get(key)
+    if worker is None:
+        # setdefault is atomic, so concurrent requests agree on one worker;
+        # an unused candidate is discarded before it ever starts a process
+        worker = _jerry_workers.setdefault(key, _JerryWorker(cmd, idle_seconds, env))
+    return worker
+
+
+class _JerryWorker:
+    """A long-lived Jerry process answering one JSON line per request line.
+
+    Protocol: the payload is written to the worker's stdin as one compact
+    JSON line; the worker answers with one JSON line on stdout, in the same
+    shape as `jerry --json context estimate`.
+
+    The process is started lazily, restarted after a crash, and stopped
+    after idle_seconds without requests. A worker that times out is killed,
+    since its next output line could belong to the abandoned request. If
+    the command exits without ever answering (e.g. a Jerry version without
+    streaming support), it is not retried for _FAILED_START_BACKOFF seconds;
+    callers use the one-shot command until a worker has answered.
+    """
+
+    _FAILED_START_BACKOFF = 60.0
+
+    def __init__(self, cmd: list[str], idle_seconds: float, env: dict[str, str]) -> None:
+        import threading
+
+        self.cmd = cmd
+        self.idle_seconds = idle_seconds
+        self.env = env
+        self._lock = threading.Lock()
+        self._process: Any = None
+        self._responses: Any = None
+        self._answered = False
+        self._retry_after = 0.0
+        self._idle_timer: Any = None
+
+    def ensure_running(self) -> bool:
+        """Start the worker if needed; False if it cannot be started now."""
+        import queue
+        import subprocess
+        import threading
+        import time
+
+        with self._lock:
+            if self._process is not None and self._process.poll() is None:
+                return True
+            if self._process is not None:
+                debug_log(f"Jerry worker exited with {self._process.returncode}")
+                if not self._answered:
+                    self._retry_after = time.monotonic() + self._FAILED_START_BACKOFF
+                self._process = None
+            if time.monotonic() < self._retry_after:
+                return False
+
+            try:
+                self._process = subprocess.Popen(
+                    self.cmd,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                    encoding="utf-8",
+                    errors="replace",
+                    bufsize=1,
+                    env=self.env,
+                )
+            except OSError as e:
+                debug_log(f"Jerry worker failed to start: {e}")
+                self._retry_after = time.monotonic() + self._FAILED_START_BACKOFF
+                return False
+
+            self._answered = False
+            self._responses = queue.Queue()
+            reader = threading.Thread(
+                target=self._read_responses,
+                args=(self._process.stdout, self._responses),
+                name="ecw-jerry-worker-reader",
+                daemon=True,
+            )
+            reader.start()
+            debug_log(f"Jerry worker started: pid={self._process.pid}")
+            return True
+
+    @property
+    def answered(self) -> bool:
+        """Whether the current worker process has answered a request."""
+        return self._answered
+
+    @staticmethod
+    def _read_responses(stdout: Any, responses: Any) -> None:
+        """Forward worker output lines to the queue; None marks end of output."""
+        for line in stdout:
+            responses.put(line)
+        responses.put(None)
+
+    def request(self, data: dict, timeout: float) -> dict[str, Any] | None:
+        """Send one payload and wait up to timeout seconds for the answer."""
+        import queue
+
+        with self._lock:
+            process = self._process
+            if process is None or process.poll() is not None:
+                return None
+            try:
+                process.stdin.write(json.dumps(data, separators=(",", ":")) + "\n")
+                process.stdin.flush()
+                line = self._responses.get(timeout=timeout)
+            except queue.Empty:
+                debug_log(f"Jerry worker timed out after {timeout}s, stopping it")
+                self._stop_locked()
+                return None
+            except OSError as e:
+                debug_log(f"Jerry worker write failed: {e}")
+                self._stop_locked()
+                return None
+            finally:
+                self._schedule_idle_stop()
+
+            if line is None:
+                debug_log("Jerry worker closed its output")
+                return None
+            try:
+                jerry_data = json.loads(line)
+            except json.JSONDecodeError as e:
+                debug_log(f"Jerry worker sent invalid JSON: {e}")
+                return None
+            self._answered = True
+            return jerry_data if isinstance(jerry_data, dict) else None
+
+    def _schedule_idle_stop(self) -> None:
+        """(Re)arm the idle timer; caller holds the lock."""
+        import threading
+
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+        if self.idle_seconds and self.idle_seconds > 0:
+            self._idle_timer = threading.Timer(self.idle_seconds, self.stop)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def stop(self) -> None:
+        """Stop the worker process (it restarts on the next request)."""
+        with self._lock:
+            if self._process is not None:
+                debug_log("Stopping Jerry worker")
+            self._stop_locked()
+
+    def _stop_locked(self) -> None:
+        """Close the worker's stdin and reap it; caller holds the lock."""
+        import subprocess
+
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
 # =============================================================================
 # ANSI COLOR UTILITIES
 # =============================================================================
@@ -547,7 +1624,7 @@ def _colors_enabled(config: dict | None) -> bool:
     - NO_COLOR environment variable is set (takes precedence, per no-color.org)
     - display.use_color config is set to false
     """
-    if os.environ.get("NO_COLOR") is not None:
+    if _getenv("NO_COLOR") is not None:
         return False
     if config is not None and not safe_get(config, "display", "use_color", default=True):
         return False
@@ -583,8 +1660,11 @@ def get_terminal_width() -> int:
     Returns 0 when running as a subprocess (no TTY) to prevent
     auto_compact_width from falsely triggering compact mode.
     Claude Code runs the statusline as a piped subprocess, so
-    os.get_terminal_size() will always fail in that context.
+    os.get_terminal_size() will always fail in that context. The daemon
+    also returns 0: its terminal (if any) is not the client's.
     """
+    if _long_running:
+        return 0
     try:
         return os.get_terminal_size().columns
     except OSError:
@@ -612,20 +1692,31 @@ def safe_get(data: dict, *keys, default: Any = None) -> Any:
 # =============================================================================
 
 
+@_profiled("transcript.parse")
 def parse_transcript_for_tools(transcript_path: str, config: dict) -> dict[str, int]:
-    """Parse transcript JSONL file to extract per-tool token usage."""
+    """Parse transcript JSONL file to extract per-tool token usage.
+
+    Parsing is incremental: the transcript index (see _open_transcript_index)
+    records how far each transcript has been consumed and the totals so far,
+    so each invocation only parses lines appended since the previous one.
+    Without the index (no sqlite3, unusable cache dir) the whole file is
+    parsed in-process. With tools.window set, only the window's slice of
+    the transcript is counted (see _transcript_window_start).
+    """
+    import time
+
     tools_config = config["tools"]
 
     if not tools_config["enabled"]:
         return {}
 
-    if not transcript_path or not Path(transcript_path).exists():
+    if not transcript_path or not os.path.exists(transcript_path):
         debug_log(f"Transcript not found: {transcript_path}")
         return {}
 
     cache_key = transcript_path
     cache_ttl = tools_config["cache_ttl_seconds"]
-    now = datetime.now().timestamp()
+    now = time.time()
 
     if cache_key in _transcript_cache:
         cached_time, cached_data = _transcript_cache[cache_key]
@@ -633,19 +1724,25 @@ def parse_transcript_for_tools(transcript_path: str, config: dict) -> dict[str,
             debug_log("Using cached transcript data")
             return cached_data
 
-    tool_tokens: dict[str, int] = {}
-
+    index = _open_transcript_index(config)
     try:
-        with open(transcript_path, encoding="utf-8", errors="replace") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    entry = json.loads(line)
-                    _extract_tool_usage(entry, tool_tokens)
-                except json.JSONDecodeError:
-                    continue
+        tool_tokens, scan, new_offset = _index_transcript(index, transcript_path, tools_config)
+
+        window_start = _transcript_window_start(
+            index, transcript_path, tools_config["window"], new_offset, now
+        )
+        if window_start is not None:
+            # Re-scan just the window; its cost follows the window, not the session
+            window_offset, scan = _parse_transcript_from(
+                transcript_path, window_start, tools_config["max_line_bytes"]
+            )
+            profile_count("transcript.window_bytes", window_offset - window_start)
+            tool_tokens = dict(scan.tool_tokens)
+
+        # A trailing line without a newline may still be mid-write; it is
+        # counted for display but never folded into the index
+        for name, tokens in scan.tail_tokens.items():
+            tool_tokens[name] = tool_tokens.get(name, 0) + tokens
 
         _transcript_cache[cache_key] = (now, tool_tokens)
         debug_log(f"Parsed transcript: {tool_tokens}")
@@ -653,10 +1750,819 @@ def parse_transcript_for_tools(transcript_path: str, config: dict) -> dict[str,
     except OSError as e:
         debug_log(f"Transcript read error: {e}")
         return {}
+    finally:
+        if index is not None:
+            index.close()
 
     return tool_tokens
 
 
+def _index_transcript(
+    index: Any | None, transcript_path: str, tools_config: dict
+) -> tuple[dict[str, int], _TranscriptScan, int]:
+    """Bring a transcript's index entry up to date.
+
+    Returns (tool_tokens, scan, new_offset): the totals of all complete
+    lines, the scan of the newly parsed part (its tail_tokens are not in
+    the totals) and the end of the last complete line.
+    """
+    stat = os.stat(transcript_path)
+    with profile_stage("transcript.index_read"):
+        stored_offset, offset, tool_tokens = _read_transcript_index(index, transcript_path, stat)
+
+    new_offset, scan = _ingest_transcript(transcript_path, offset, tools_config)
+    profile_count("transcript.bytes_parsed", new_offset - offset)
+
+    if index is not None and not offset == new_offset == stored_offset:
+        _write_transcript_index(
+            index, transcript_path, stat, stored_offset, offset, tool_tokens, new_offset, scan
+        )
+
+    totals = dict(tool_tokens)
+    for name, tokens in scan.tool_tokens.items():
+        totals[name] = totals.get(name, 0) + tokens
+    return totals, scan, new_offset
+
+
+class _TranscriptScan:
+    """What scanning part of a transcript produced."""
+
+    def __init__(self, max_line_bytes: int = 0) -> None:
+        self.max_line_bytes = max_line_bytes  # see _tally_oversized_line
+        self.tool_tokens: dict[str, int] = {}  # from newline-terminated lines
+        self.tail_tokens: dict[str, int] = {}  # from an unterminated last line
+        # (offset, timestamp, role, input_tokens, output_tokens) per usage line
+        self.turns: list[tuple[int, float | None, str, int, int]] = []
+        self.parsed = 0
+        self.skipped = 0
+
+
+def _parse_transcript_from(
+    transcript_path: str, offset: int, max_line_bytes: int = 0
+) -> tuple[int, _TranscriptScan]:
+    """Parse transcript lines starting at a byte offset.
+
+    Returns (new_offset, scan), where new_offset is the end of the last
+    newline-terminated line. Lines over max_line_bytes (if set) are never
+    decoded whole.
+    """
+    scan = _TranscriptScan(max_line_bytes)
+
+    with open(transcript_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if offset < size:
+            offset = _scan_transcript_mmap(f, offset, size, scan)
+
+    profile_count("transcript.lines_parsed", scan.parsed)
+    profile_count("transcript.lines_skipped", scan.skipped)
+    return offset, scan
+
+
+def _scan_transcript_mmap(f: Any, offset: int, size: int, scan: _TranscriptScan) -> int:
+    """Scan [offset, size) of f through successive mmap windows.
+
+    size is normally the file size; a parallel ingest chunk passes its end,
+    which is always a line boundary.
+
+    Newlines and markers are searched in the mapping itself, so skipped
+    lines never become Python objects. A line longer than the window grows
+    the window until it fits, unless it exceeds scan.max_line_bytes: then it
+    goes to _tally_oversized_line(). Falls back to
+    _scan_transcript_buffered() if the file cannot be mapped. Returns the
+    end of the last complete line.
+
+    Transcripts can be truncated and rewritten in place. Each window is
+    clamped to the file's current size, but a cut inside a mapped window
+    still raises SIGBUS on the pages past the new EOF, so the daemon (which
+    must survive any one transcript) always uses buffered reads.
+    """
+    if _long_running:
+        return _scan_transcript_buffered(f, offset, scan, size)
+    try:
+        import mmap
+    except ImportError:
+        return _scan_transcript_buffered(f, offset, scan, size)
+
+    cap = scan.max_line_bytes
+    window = _TRANSCRIPT_MMAP_WINDOW
+    while True:
+        # The file may have shrunk since the last window; the index notices
+        # the rewrite on the next refresh
+        size = min(size, os.fstat(f.fileno()).st_size)
+        if offset >= size:
+            return offset
+        base = offset - offset % mmap.ALLOCATIONGRANULARITY
+        length = min(size - base, offset - base + window)
+        at_eof = base + length >= size
+        try:
+            mm = mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ, offset=base)
+        except (OSError, ValueError) as e:
+            debug_log(f"Transcript mmap failed, using buffered reads: {e}")
+            return _scan_transcript_buffered(f, offset, scan, size)
+        profile_count("transcript.mmap_windows")
+
+        with mm:
+            start = offset - base
+            newline = mm.find(b"\n", start)
+            while newline != -1:
+                if cap and newline + 1 - start > cap:
+                    _tally_oversized_line(f, base + start, size, scan)
+                else:
+                    _tally_transcript_line(mm, start, newline + 1, base + start, scan)
+                start = newline + 1
+                newline = mm.find(b"\n", start)
+            if at_eof:
+                if cap and length - start > cap:
+                    _tally_oversized_line(f, base + start, size, scan)
+                elif start < length:
+                    _tally_transcript_line(mm, start, length, None, scan)
+                return base + start
+
+        if base + start == offset:
+            if cap and length - start > cap:
+                line_end, terminated = _tally_oversized_line(f, offset, size, scan)
+                if not terminated:
+                    return offset
+                offset = line_end
+                window = _TRANSCRIPT_MMAP_WINDOW
+            else:
+                window *= 2
+        else:
+            offset = base + start
+            window = _TRANSCRIPT_MMAP_WINDOW
+
+
+def _scan_transcript_buffered(
+    f: Any, offset: int, scan: _TranscriptScan, end: int | None = None
+) -> int:
+    """Scan f from offset to end (default EOF) with buffered line reads (no mmap)."""
+    cap = scan.max_line_bytes
+    f.seek(offset)
+    while end is None or offset < end:
+        raw_line = f.readline(cap + 1) if cap else f.readline()
+        if not raw_line:
+            break
+        if cap and len(raw_line) > cap:
+            limit = end if end is not None else os.fstat(f.fileno()).st_size
+            line_end, terminated = _tally_oversized_line(f, offset, limit, scan)
+            if not terminated:
+                break
+            offset = line_end
+            f.seek(offset)
+        elif raw_line.endswith(b"\n") and (end is None or offset + len(raw_line) <= end):
+            _tally_transcript_line(raw_line, 0, len(raw_line), offset, scan)
+            offset += len(raw_line)
+        else:
+            _tally_transcript_line(raw_line, 0, len(raw_line), None, scan)
+            break
+    return offset
+
+
+def _ingest_transcript(
+    transcript_path: str, offset: int, tools_config: dict
+) -> tuple[int, _TranscriptScan]:
+    """Parse a transcript from offset, in parallel chunks if much is unparsed.
+
+    A cold ingest of a huge transcript is split at line boundaries and the
+    chunks are scanned in a process pool; the merged result is the same as
+    _parse_transcript_from() would return. Falls back to a sequential scan
+    with a single CPU or if the pool cannot be used. In a source a one-shot
+    run may abandon, it raises _IngestDeferred instead: the pool would hold
+    up exit, so the ingest is left to the hand-off.
+    """
+    threshold = int(tools_config["parallel_ingest_mb"] * (1 << 20))
+    workers = tools_config["parallel_workers"]
+    if workers <= 0:
+        # Respect CPU affinity where the platform exposes it
+        affinity = getattr(os, "sched_getaffinity", None)
+        workers = len(affinity(0)) if affinity else os.cpu_count() or 1
+    if threshold > 0 and workers > 1:
+        try:
+            size = os.path.getsize(transcript_path)
+            if size - offset >= threshold:
+                if _sources_abandonable.get():
+                    raise _IngestDeferred(transcript_path)
+                return _parse_transcript_parallel(
+                    transcript_path, offset, size, workers, tools_config["max_line_bytes"]
+                )
+        except (ImportError, OSError, RuntimeError) as e:
+            # BrokenProcessPool is a RuntimeError; OSError covers fork limits
+            debug_log(f"Parallel transcript ingest failed, parsing sequentially: {e}")
+    return _parse_transcript_from(transcript_path, offset, tools_config["max_line_bytes"])
+
+
+class _IngestDeferred(Exception):
+    """A cold parallel ingest was left to the hand-off (see _ingest_transcript)."""
+
+
+# Whether the current source may be abandoned at exit (one-shot, with a budget)
+_sources_abandonable: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "ecw_sources_abandonable", default=False
+)
+
+
+@_profiled("transcript.parallel_ingest")
+def _parse_transcript_parallel(
+    transcript_path: str, offset: int, size: int, workers: int, max_line_bytes: int
+) -> tuple[int, _TranscriptScan]:
+    """Scan [offset, size) of a transcript as chunks in a process pool."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    bounds = _split_transcript(transcript_path, offset, size, workers * 4)
+    tasks = [
+        (transcript_path, start, end, max_line_bytes) for start, end in zip(bounds, bounds[1:])
+    ]
+    profile_count("transcript.parallel_chunks", len(tasks))
+    debug_log(f"Parallel transcript ingest: {len(tasks)} chunks, {workers} workers")
+
+    # spawn, not fork: the daemon may have threads running
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        min(workers, len(tasks)), mp_context=context, initializer=_detach_ingest_worker
+    ) as pool:
+        results = list(pool.map(_parse_transcript_chunk, tasks))
+
+    scan = _TranscriptScan()
+    new_offset = offset
+    for new_offset, tool_tokens, tail_tokens, turns, parsed, skipped in results:
+        for name, tokens in tool_tokens.items():
+            scan.tool_tokens[name] = scan.tool_tokens.get(name, 0) + tokens
+        scan.tail_tokens = tail_tokens  # only the last chunk can have a tail
+        scan.turns.extend(turns)
+        scan.parsed += parsed
+        scan.skipped += skipped
+
+    profile_count("transcript.lines_parsed", scan.parsed)
+    profile_count("transcript.lines_skipped", scan.skipped)
+    return new_offset, scan
+
+
+def _split_transcript(transcript_path: str, start: int, end: int, chunks: int) -> list[int]:
+    """Chunk boundaries for [start, end), each at the start of a line.
+
+    Chunks are at least 64 KB, so small ranges get fewer of them.
+    """
+    chunks = max(1, min(chunks, (end - start) // (64 << 10)))
+    bounds = [start]
+    with open(transcript_path, "rb") as f:
+        for i in range(1, chunks):
+            position = max(bounds[-1], start + (end - start) * i // chunks)
+            f.seek(position)
+            # Find the next newline in small reads: the line may be huge
+            while position < end:
+                block = f.read(64 << 10)
+                newline = block.find(b"\n")
+                if newline != -1 or not block:
+                    position += newline + 1 if newline != -1 else len(block)
+                    break
+                position += len(block)
+            if bounds[-1] < position < end:
+                bounds.append(position)
+    bounds.append(end)
+    return bounds
+
+
+def _detach_ingest_worker() -> None:
+    """Process pool initializer: point the worker's stdout and stderr at devnull.
+
+    A worker holding the status line's pipes open would keep its reader
+    waiting after the output was written.
+    """
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    try:
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+    finally:
+        os.close(devnull)
+
+
+def _parse_transcript_chunk(task: tuple[str, int, int, int]) -> tuple:
+    """Process pool worker: scan one chunk of a transcript.
+
+    Returns plain data (end, tool_tokens, tail_tokens, turns, parsed,
+    skipped) so results unpickle whatever the module is named.
+    """
+    transcript_path, start, end, max_line_bytes = task
+    scan = _TranscriptScan(max_line_bytes)
+    with open(transcript_path, "rb") as f:
+        start = _scan_transcript_mmap(f, start, end, scan)
+    return start, scan.tool_tokens, scan.tail_tokens, scan.turns, scan.parsed, scan.skipped
+
+
+def _tally_transcript_line(
+    buf: Any, start: int, end: int, line_offset: int | None, scan: _TranscriptScan
+) -> None:
+    """Add the usage of the line buf[start:end] to scan.
+
+    line_offset is the line's position in the file, or None for an
+    unterminated last line (counted into tail_tokens, never into turns).
+    Byte-level prefilter: a line without a marker has nothing to count and
+    is neither copied, decoded nor parsed.
+    """
+    if _TRANSCRIPT_MARKER_RE.search(buf, start, end) is None:
+        scan.skipped += 1
+        return
+    scan.parsed += 1
+    try:
+        entry = json.loads(buf[start:end].decode("utf-8", errors="replace"))
+    except json.JSONDecodeError:
+        return
+    _tally_entry(entry, line_offset, scan)
+
+
+def _tally_entry(entry: Any, line_offset: int | None, scan: _TranscriptScan) -> None:
+    """Add the usage of a parsed transcript entry to scan."""
+    if not isinstance(entry, dict):
+        return
+    if line_offset is None:
+        _extract_tool_usage(entry, scan.tail_tokens)
+        return
+    _extract_tool_usage(entry, scan.tool_tokens)
+
+    message = entry.get("message")
+    if not isinstance(message, dict):
+        message = {}
+    usage = entry.get("usage") or message.get("usage")
+    if isinstance(usage, dict) and usage:
+        # The whole prompt, cached or not, is what occupies the context
+        input_tokens = (
+            _int_or_zero(usage.get("input_tokens"))
+            + _int_or_zero(usage.get("cache_creation_input_tokens"))
+            + _int_or_zero(usage.get("cache_read_input_tokens"))
+        )
+        scan.turns.append(
+            (
+                line_offset,
+                _parse_timestamp(entry.get("timestamp")),
+                message.get("role", "unknown"),
+                input_tokens,
+                _int_or_zero(usage.get("output_tokens")),
+            )
+        )
+
+
+def _tally_oversized_line(
+    f: Any, start: int, limit: int, scan: _TranscriptScan
+) -> tuple[int, bool]:
+    """Add the usage of a line longer than scan.max_line_bytes to scan.
+
+    The line is streamed in window-sized reads and reduced to a skeleton
+    in which long strings are only measured (see _read_line_skeleton), so
+    memory stays bounded whatever the line's size. Token estimates equal
+    those of a full parse except that long strings count their encoded
+    bytes rather than characters. A skeleton that still exceeds the cap
+    (e.g. millions of short strings) is skipped.
+
+    Returns (line_end, terminated): the offset after the line's newline, or
+    the limit and False for an unterminated last line (counted as a tail).
+    """
+    profile_count("transcript.oversized_lines")
+    skeleton, line_end, terminated = _read_line_skeleton(f, start, limit, scan.max_line_bytes)
+    if skeleton is None or _TRANSCRIPT_MARKER_RE.search(skeleton) is None:
+        if skeleton is None:
+            debug_log(f"Skipping transcript line at byte {start}: over max_line_bytes")
+        scan.skipped += 1
+        return line_end, terminated
+    scan.parsed += 1
+    try:
+        entry = json.loads(skeleton.decode("utf-8", errors="replace"))
+    except json.JSONDecodeError:
+        return line_end, terminated
+    _tally_entry(_restore_sized_strings(entry), start if terminated else None, scan)
+    return line_end, terminated
+
+
+def _read_line_skeleton(
+    f: Any, start: int, limit: int, cap: int
+) -> tuple[bytearray | None, int, bool]:
+    """Read the line at start as JSON text with long strings replaced.
+
+    A string longer than _TRANSCRIPT_LONG_STRING bytes becomes
+    "<_SIZED_STRING_MARK><length>", its length counted over window-sized
+    reads without decoding. Returns (skeleton, line_end, terminated);
+    skeleton is None if it would exceed cap or the line is not valid JSON
+    text at the string level.
+    """
+    skeleton: bytearray | None = bytearray()
+    in_string = False
+    kept: bytearray | None = None
+    length = 0
+    leftover = b""
+    position = start  # file offset of buf[0]
+    f.seek(start)
+    while True:
+        chunk = f.read(min(_TRANSCRIPT_MMAP_WINDOW, limit - position - len(leftover)))
+        buf = leftover + chunk if leftover else chunk
+        leftover = b""
+        if not chunk:
+            return skeleton, limit, False
+        size = len(buf)
+        i = 0
+        while i < size:
+            if not in_string:
+                stop = _SKELETON_STOP_RE.search(buf, i)
+                k = size if stop is None else stop.start()
+                if skeleton is not None:
+                    skeleton += buf[i:k]
+                if k == size:
+                    break
+                if buf[k] == 0x0A:  # newline: end of the line
+                    return skeleton, position + k + 1, True
+                in_string, kept, length, i = True, bytearray(), 0, k + 1
+                continue
+            stop = min(size, i + _JSON_STRING_SPAN)
+            j = _JSON_STRING_BODY_RE.match(buf, i, stop).end()
+            piece = buf[i:j]
+            length += _decoded_length(piece)
+            if kept is not None:
+                kept = kept + piece if length <= _TRANSCRIPT_LONG_STRING else None
+            i = j
+            if j == size:
+                break
+            if j == stop:  # span boundary (possibly splitting an escape)
+                continue
+            if buf[j] == 0x22:  # closing quote
+                if skeleton is not None:
+                    if kept is not None:
+                        skeleton += b'"' + kept + b'"'
+                    else:
+                        skeleton += b'"\\ue000%d"' % length
+                in_string, i = False, j + 1
+            elif buf[j] == 0x0A:  # newline inside a string: not valid JSON
+                return None, position + j + 1, True
+            elif j + 1 == size:  # backslash split from what it escapes
+                leftover = buf[j:]
+                break
+            elif j + 1 < stop:  # backslash-newline
+                return None, position + j + 2, True
+        if skeleton is not None and len(skeleton) > cap:
+            skeleton = None
+        position += size - len(leftover)
+
+
+def _decoded_length(piece: bytes) -> int:
+    """Characters that JSON string bytes decode to.
+
+    Exact when piece does not split an escape sequence or a UTF-8 character
+    (a literal backslash followed by "u" is taken for a \\uXXXX escape).
+    """
+    backslashes = piece.count(b"\\")
+    if backslashes:
+        # In a run of n backslashes, n // 2 are escaped backslashes
+        escapes = backslashes - piece.count(b"\\\\")
+        unicode_escapes = piece.count(b"\\u")
+    else:
+        escapes = unicode_escapes = 0
+    continuation = len(piece.translate(None, _UTF8_NON_CONTINUATION))
+    return len(piece) - escapes - 4 * unicode_escapes - continuation
+
+
+class _SizedString(str):
+    """Stand-in for a long transcript string that was measured, not decoded.
+
+    len() reports the measured length, so _estimate_tokens() and
+    _json_length() treat it like the original string.
+    """
+
+    def __new__(cls, length: int) -> _SizedString:
+        value = super().__new__(cls, "")
+        value.length = length
+        return value
+
+    def __len__(self) -> int:
+        return self.length
+
+
+def _restore_sized_strings(value: Any) -> Any:
+    """Replace the length markers of a parsed skeleton with _SizedString."""
+    if isinstance(value, str):
+        if value.startswith(_SIZED_STRING_MARK) and value[1:].isdigit():
+            return _SizedString(int(value[1:]))
+        return value
+    if isinstance(value, dict):
+        return {key: _restore_sized_strings(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_restore_sized_strings(item) for item in value]
+    return value
+
+
+def _parse_timestamp(value: Any) -> float | None:
+    """Epoch seconds for an ISO-8601 transcript timestamp, or None."""
+    if not isinstance(value, str) or not value:
+        return None
+    from datetime import datetime
+
+    try:
+        # fromisoformat() only accepts a "Z" suffix from Python 3.11
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _int_or_zero(value: Any) -> int:
+    """value if it is an int (not a bool), else 0."""
+    return value if isinstance(value, int) and not isinstance(value, bool) else 0
+
+
+# =============================================================================
+# TRANSCRIPT INDEX (SQLite)
+# =============================================================================
+#
+# <cache_dir>/transcripts.db holds per-transcript aggregates so incremental
+# parsing survives process exit and other tools can query them:
+#   transcripts  one row per transcript: identity (inode, size, mtime_ns,
+#                CRC of the first KB) and the byte offset parsed so far
+#   tool_totals  token totals per (transcript, tool) up to that offset
+#   turns        one row per line with usage: offset, timestamp, role, tokens
+#   checkpoints  the last few parsed offsets, each with the CRC of the KB
+#                before it and the totals up to it
+#
+# Before resuming, the file is validated against the stored fingerprint. A
+# new inode or a changed start means the transcript was replaced: it is
+# re-parsed from scratch. If only the bytes before the parsed offset changed
+# (truncated, or its end rewritten), parsing resumes from the newest
+# checkpoint that still matches, so only the rewritten part is parsed again.
+
+
+def _open_transcript_index(config: dict) -> Any | None:
+    """Open the transcript index, creating or rebuilding it as needed.
+
+    Returns an sqlite3 connection in autocommit mode, or None when sqlite3
+    or the cache dir is unavailable (callers then parse in-process).
+    """
+    cache_dir = _resolve_cache_dir(config)
+    if cache_dir is None:
+        return None
+    try:
+        import sqlite3
+    except ImportError:
+        debug_log("sqlite3 unavailable, transcript index disabled")
+        return None
+
+    with profile_stage("transcript.index_open"):
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            conn = sqlite3.connect(
+                os.path.join(cache_dir, "transcripts.db"), timeout=2.0, isolation_level=None
+            )
+        except (OSError, sqlite3.Error) as e:
+            debug_log(f"Transcript index unavailable: {e}")
+            return None
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != _TRANSCRIPT_INDEX_VERSION:
+                _rebuild_transcript_index(conn)
+            return conn
+        except sqlite3.Error as e:
+            debug_log(f"Transcript index unusable: {e}")
+            conn.close()
+            return None
+
+
+def _rebuild_transcript_index(conn: Any) -> None:
+    """Recreate the index tables unless another process just did."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Checked again under the write lock: a concurrent opener may have
+        # rebuilt (and started filling) the index since the first check
+        if conn.execute("PRAGMA user_version").fetchone()[0] != _TRANSCRIPT_INDEX_VERSION:
+            debug_log("Transcript index version mismatch, rebuilding")
+            for table in (
+                "transcripts",
+                "tool_totals",
+                "turns",
+                "checkpoints",
+                "sidechains",
+                "sidechain_dirs",
+            ):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            for statement in _TRANSCRIPT_INDEX_SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {_TRANSCRIPT_INDEX_VERSION}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _read_transcript_index(
+    index: Any | None, transcript_path: str, stat: os.stat_result
+) -> tuple[int | None, int, dict[str, int]]:
+    """Where to resume parsing a transcript.
+
+    Returns (stored_offset, offset, tool_tokens): the offset stored in the
+    index (None without a row), the offset to parse from and the totals up
+    to it. See the section comment for how the stored state is validated.
+    """
+    if index is None:
+        return None, 0, {}
+    import sqlite3
+
+    try:
+        # One read transaction, so the row and checkpoints match
+        index.execute("BEGIN")
+        try:
+            row = index.execute(
+                "SELECT inode, size, mtime_ns, offset, head_crc FROM transcripts WHERE path = ?",
+                (transcript_path,),
+            ).fetchone()
+            checkpoints = index.execute(
+                "SELECT offset, tail_crc, totals FROM checkpoints WHERE path = ?"
+                " ORDER BY offset DESC",
+                (transcript_path,),
+            ).fetchall()
+        finally:
+            index.execute("COMMIT")
+    except sqlite3.Error as e:
+        debug_log(f"Transcript index read failed: {e}")
+        return None, 0, {}
+
+    if row is None:
+        return None, 0, {}
+    inode, size, mtime_ns, stored_offset, head_crc = row
+    if inode != stat.st_ino:
+        debug_log("Transcript replaced (new inode), re-parsing from start")
+        profile_count("transcript.rebuild_full")
+        return stored_offset, 0, {}
+
+    unchanged = size == stat.st_size and mtime_ns == stat.st_mtime_ns
+    try:
+        with open(transcript_path, "rb") as f:
+            if not unchanged and _transcript_crc(f, 0, stored_offset) != head_crc:
+                debug_log("Transcript start rewritten, re-parsing from start")
+                profile_count("transcript.rebuild_full")
+                return stored_offset, 0, {}
+            for offset, tail_crc, totals in checkpoints:
+                if offset > stat.st_size:
+                    continue
+                if unchanged and offset == stored_offset:
+                    return stored_offset, offset, json.loads(totals)
+                if _transcript_crc(f, offset, None) == tail_crc:
+                    if offset == stored_offset:
+                        debug_log(f"Resuming transcript parse at byte {offset}")
+                    else:
+                        debug_log(f"Transcript rewritten, resuming from checkpoint {offset}")
+                        profile_count("transcript.rebuild_partial")
+                    return stored_offset, offset, json.loads(totals)
+    except (OSError, ValueError) as e:
+        debug_log(f"Transcript validation failed: {e}")
+    debug_log("No transcript checkpoint matches, re-parsing from start")
+    profile_count("transcript.rebuild_full")
+    return stored_offset, 0, {}
+
+
+def _transcript_window_start(
+    index: Any | None, transcript_path: str, window: dict, end: int, now: float
+) -> int | None:
+    """Byte offset where the configured tools.window starts, or None.
+
+    The window starts at the Nth-last turn and/or the first turn of the last
+    M minutes (whichever is later), found through the turns table's
+    (path, offset) and (path, ts) indexes. end is used when no turn falls
+    into the time window. None means the whole session: no window, fewer
+    turns than requested, or no transcript index to query.
+    """
+    turns = window.get("turns", 0)
+    minutes = window.get("minutes", 0)
+    if turns <= 0 and minutes <= 0:
+        return None
+    if index is None:
+        debug_log("tools.window needs the transcript index, using the whole session")
+        return None
+    import sqlite3
+
+    starts = []
+    with profile_stage("transcript.window_query"):
+        try:
+            if turns > 0:
+                row = index.execute(
+                    "SELECT offset FROM turns WHERE path = ? ORDER BY offset DESC LIMIT 1 OFFSET ?",
+                    (transcript_path, turns - 1),
+                ).fetchone()
+                if row is not None:
+                    starts.append(row[0])
+            if minutes > 0:
+                row = index.execute(
+                    "SELECT MIN(offset) FROM turns WHERE path = ? AND ts >= ?",
+                    (transcript_path, now - minutes * 60),
+                ).fetchone()
+                starts.append(end if row[0] is None else row[0])
+        except sqlite3.Error as e:
+            debug_log(f"Transcript window query failed: {e}")
+            return None
+    return max(starts) if starts else None
+
+
+def _transcript_crc(f: Any, offset: int, end: int | None) -> int:
+    """CRC of a fingerprint-sized slice of f.
+
+    With end=None, the bytes just before offset; otherwise the bytes from
+    offset, stopping at end.
+    """
+    import zlib
+
+    if end is None:
+        start = max(0, offset - _TRANSCRIPT_FINGERPRINT_BYTES)
+        length = offset - start
+    else:
+        start, length = offset, min(_TRANSCRIPT_FINGERPRINT_BYTES, end - offset)
+    f.seek(start)
+    return zlib.crc32(f.read(length))
+
+
+def _write_transcript_index(
+    index: Any,
+    transcript_path: str,
+    stat: os.stat_result,
+    stored_offset: int | None,
+    offset: int,
+    tool_tokens: dict[str, int],
+    new_offset: int,
+    scan: _TranscriptScan,
+) -> None:
+    """Record a scan of [offset, new_offset) on top of the totals at offset.
+
+    The write is skipped if another process moved the stored offset since
+    it was read (its own scan already covers these lines). Degrades to a
+    debug log on any database or read error.
+    """
+    import sqlite3
+    import time
+
+    totals = dict(tool_tokens)
+    for name, tokens in scan.tool_tokens.items():
+        totals[name] = totals.get(name, 0) + tokens
+
+    with profile_stage("transcript.index_write"):
+        try:
+            with open(transcript_path, "rb") as f:
+                head_crc = _transcript_crc(f, 0, new_offset)
+                tail_crc = _transcript_crc(f, new_offset, None)
+
+            index.execute("BEGIN IMMEDIATE")
+            try:
+                row = index.execute(
+                    "SELECT offset FROM transcripts WHERE path = ?", (transcript_path,)
+                ).fetchone()
+                if (row[0] if row else None) != stored_offset:
+                    debug_log("Transcript index updated concurrently, skipping write")
+                    index.execute("ROLLBACK")
+                    return
+                # Anything recorded past offset was re-parsed (or is gone)
+                index.execute(
+                    "DELETE FROM turns WHERE path = ? AND offset >= ?", (transcript_path, offset)
+                )
+                index.execute(
+                    "DELETE FROM checkpoints WHERE path = ? AND offset > ?",
+                    (transcript_path, offset),
+                )
+                index.execute("DELETE FROM tool_totals WHERE path = ?", (transcript_path,))
+                index.executemany(
+                    "INSERT INTO tool_totals (path, tool, tokens) VALUES (?, ?, ?)",
+                    [(transcript_path, name, tokens) for name, tokens in totals.items()],
+                )
+                index.executemany(
+                    "INSERT OR REPLACE INTO turns"
+                    " (path, offset, ts, role, input_tokens, output_tokens)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [(transcript_path, *turn) for turn in scan.turns],
+                )
+                index.execute(
+                    "INSERT OR REPLACE INTO checkpoints (path, offset, tail_crc, totals)"
+                    " VALUES (?, ?, ?, ?)",
+                    (transcript_path, new_offset, tail_crc, json.dumps(totals)),
+                )
+                index.execute(
+                    "DELETE FROM checkpoints WHERE path = ? AND offset NOT IN"
+                    " (SELECT offset FROM checkpoints WHERE path = ?"
+                    " ORDER BY offset DESC LIMIT ?)",
+                    (transcript_path, transcript_path, _TRANSCRIPT_CHECKPOINTS),
+                )
+                index.execute(
+                    "INSERT OR REPLACE INTO transcripts"
+                    " (path, inode, size, mtime_ns, offset, head_crc, updated)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        transcript_path,
+                        stat.st_ino,
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                        new_offset,
+                        head_crc,
+                        time.time(),
+                    ),
+                )
+                index.execute("COMMIT")
+            except BaseException:
+                index.execute("ROLLBACK")
+                raise
+        except (OSError, sqlite3.Error) as e:
+            debug_log(f"Transcript index write failed: {e}")
+
+
 def _extract_tool_usage(entry: dict, tool_tokens: dict[str, int]) -> None:
     """Extract tool usage from a transcript entry."""
     message = entry.get("message", {})
@@ -692,10 +2598,283 @@ def _estimate_tokens(data: Any) -> int:
     if isinstance(data, str):
         return len(data) // 4
     elif isinstance(data, (dict, list)):
-        return len(json.dumps(data)) // 4
+        return _json_length(data) // 4
     return 0
 
 
+def _json_length(data: Any) -> int:
+    """Length of json.dumps(data), computed without serializing it.
+
+    Exact for content without escapes; escaped characters count once
+    rather than as their escape sequence. Walking the structure is O(items)
+    where json.dumps is O(bytes), which matters for large Edit/Write inputs.
+    """
+    if isinstance(data, str):
+        return len(data) + 2
+    if isinstance(data, dict):
+        # "{}" plus ", " between items, each item "key": value
+        length = 2 + 2 * max(len(data) - 1, 0)
+        for key, value in data.items():
+            length += len(str(key)) + 4 + _json_length(value)
+        return length
+    if isinstance(data, list):
+        length = 2 + 2 * max(len(data) - 1, 0)
+        for item in data:
+            length += _json_length(item)
+        return length
+    if data is None or data is True:
+        return 4
+    if data is False:
+        return 5
+    return len(repr(data))
+
+
+# =============================================================================
+# SUB-AGENT TRANSCRIPTS
+# =============================================================================
+#
+# Sub-agents (sidechains) write their own transcripts, either under
+# <project>/<session_id>/subagents/ or, in older layouts, as agent-*.jsonl
+# beside the session transcript with the session's id in each entry. They
+# are indexed like the main transcript, so each refresh only reads what was
+# appended, and summarised in the shape of Jerry's "sub_agents" data.
+#
+# Which session each agent-*.jsonl belongs to is kept in the transcript
+# index (sidechains), together with the project dir's mtime when it was last
+# listed (sidechain_dirs): while the dir is unchanged, no refresh lists it or
+# opens an agent transcript to find its sessionId.
+
+# sessionId of an entry, found without parsing the whole line
+_SESSION_ID_RE = re.compile(rb'"sessionId"\s*:\s*"([^"]*)"')
+
+# Sidechain transcript path -> sessionId (fixed once the file exists)
+_sidechain_sessions: dict[str, str] = {}
+
+# Sub-agent transcripts are indexed by up to this many threads
+_SUB_AGENT_WORKERS = 4
+
+# A project dir listing is only trusted later once the dir's mtime is this
+# old; a file added within the same mtime tick would otherwise go unseen
+_SIDECHAIN_DIR_SETTLE_SECONDS = 2.0
+
+
+def discover_sub_agent_transcripts(data: dict, config: dict) -> list[str]:
+    """Find the transcripts of the session's sub-agents."""
+    transcript_path = safe_get(data, "transcript_path", default="")
+    if not transcript_path or not os.path.isfile(transcript_path):
+        return []
+
+    paths = []
+    subagents_dir = os.path.join(os.path.splitext(transcript_path)[0], "subagents")
+    try:
+        paths.extend(
+            os.path.join(subagents_dir, name)
+            for name in sorted(os.listdir(subagents_dir))
+            if name.endswith(".jsonl")
+        )
+    except OSError:
+        pass
+
+    session_id = safe_get(data, "session_id", default="")
+    if session_id:
+        sessions = _sidechain_transcripts(os.path.dirname(transcript_path), config)
+        paths.extend(sorted(path for path, owner in sessions.items() if owner == session_id))
+    return paths
+
+
+@_profiled("sub_agents.sidechains")
+def _sidechain_transcripts(project_dir: str, config: dict) -> dict[str, str]:
+    """sessionId of each agent-*.jsonl in a project dir, from the index when current."""
+    try:
+        mtime_ns = os.stat(project_dir).st_mtime_ns
+    except OSError:
+        return {}
+    index = _open_transcript_index(config)
+    try:
+        sessions = _indexed_sidechains(index, project_dir, mtime_ns)
+        if sessions is None:
+            sessions = _list_sidechains(index, project_dir, mtime_ns)
+        return sessions
+    finally:
+        if index is not None:
+            index.close()
+
+
+def _indexed_sidechains(index: Any | None, project_dir: str, mtime_ns: int) -> dict | None:
+    """The indexed sidechains of a project dir, or None unless its listing is current."""
+    if index is None:
+        return None
+    import sqlite3
+
+    try:
+        row = index.execute(
+            "SELECT mtime_ns FROM sidechain_dirs WHERE dir = ?", (project_dir,)
+        ).fetchone()
+        if row is None or row[0] != mtime_ns:
+            return None
+        return dict(
+            index.execute("SELECT path, session_id FROM sidechains WHERE dir = ?", (project_dir,))
+        )
+    except sqlite3.Error as e:
+        debug_log(f"Sidechain index query failed: {e}")
+        return None
+
+
+def _list_sidechains(index: Any | None, project_dir: str, mtime_ns: int) -> dict[str, str]:
+    """List a project dir's sidechains, reading only the sessionIds not yet indexed."""
+    import time
+
+    known: dict[str, str] = {}
+    if index is not None:
+        import sqlite3
+
+        try:
+            known = dict(
+                index.execute(
+                    "SELECT path, session_id FROM sidechains WHERE dir = ?", (project_dir,)
+                )
+            )
+        except sqlite3.Error as e:
+            debug_log(f"Sidechain index query failed: {e}")
+    try:
+        names = os.listdir(project_dir)
+    except OSError:
+        return {}
+
+    sessions = {}
+    complete = True
+    for name in names:
+        if name.startswith("agent-") and name.endswith(".jsonl"):
+            path = os.path.join(project_dir, name)
+            session_id = known.get(path) or _sidechain_session(path)
+            if session_id:
+                sessions[path] = session_id
+            else:
+                # Not written yet: look again next time
+                complete = False
+    if index is not None:
+        settled = time.time() - mtime_ns / 1e9 > _SIDECHAIN_DIR_SETTLE_SECONDS
+        _write_sidechains(index, project_dir, sessions, mtime_ns if complete and settled else None)
+    return sessions
+
+
+def _write_sidechains(
+    index: Any, project_dir: str, sessions: dict[str, str], mtime_ns: int | None
+) -> None:
+    """Store a project dir's sidechains; mtime_ns None leaves the listing untrusted."""
+    import sqlite3
+
+    try:
+        index.execute("BEGIN IMMEDIATE")
+        try:
+            index.execute("DELETE FROM sidechains WHERE dir = ?", (project_dir,))
+            index.executemany(
+                "INSERT OR REPLACE INTO sidechains (path, dir, session_id) VALUES (?, ?, ?)",
+                [(path, project_dir, session_id) for path, session_id in sessions.items()],
+            )
+            if mtime_ns is None:
+                index.execute("DELETE FROM sidechain_dirs WHERE dir = ?", (project_dir,))
+            else:
+                index.execute(
+                    "INSERT OR REPLACE INTO sidechain_dirs (dir, mtime_ns) VALUES (?, ?)",
+                    (project_dir, mtime_ns),
+                )
+            index.execute("COMMIT")
+        except BaseException:
+            index.execute("ROLLBACK")
+            raise
+    except sqlite3.Error as e:
+        debug_log(f"Sidechain index write failed: {e}")
+
+
+def _sidechain_session(path: str) -> str:
+    """sessionId recorded in a sidechain transcript's first entry ("" if none)."""
+    if path in _sidechain_sessions:
+        return _sidechain_sessions[path]
+    try:
+        with open(path, "rb") as f:
+            match = _SESSION_ID_RE.search(f.readline(65536))
+    except OSError:
+        return ""
+    if match is None:
+        return ""
+    session_id = match.group(1).decode("utf-8", errors="replace")
+    _sidechain_sessions[path] = session_id
+    return session_id
+
+
+@_profiled("sub_agents.summarise")
+def summarise_sub_agent_transcripts(paths: list[str], config: dict) -> dict | None:
+    """Summarise sub-agent transcripts like Jerry's "sub_agents" data.
+
+    The transcripts are indexed on a few threads, each with its own index
+    connection. An agent whose transcript changed within
+    sub_agents.active_seconds counts as active; total_context_tokens sums
+    each agent's latest prompt size.
+    """
+    if not paths:
+        return None
+    import time
+
+    workers = min(_SUB_AGENT_WORKERS, len(paths))
+    groups = [paths[i::workers] for i in range(workers)]
+    background = [
+        _BackgroundTask("sub-agents", _index_sub_agents, group, config) for group in groups[1:]
+    ]
+    agents = _index_sub_agents(groups[0], config)
+    for task in background:
+        task.join()
+        agents.extend(task.result())
+
+    now = time.time()
+    active_seconds = config["sub_agents"]["active_seconds"]
+    active = sum(1 for mtime, _ in agents if now - mtime < active_seconds)
+    return {
+        "total_count": len(agents),
+        "active_count": active,
+        "completed_count": len(agents) - active,
+        "aggregate": {"total_context_tokens": sum(context for _, context in agents)},
+    }
+
+
+def _index_sub_agents(paths: list[str], config: dict) -> list[tuple[float, int]]:
+    """(mtime, latest context tokens) of each readable sub-agent transcript."""
+    agents = []
+    index = _open_transcript_index(config)
+    try:
+        for path in paths:
+            try:
+                mtime = os.path.getmtime(path)
+                _, scan, _ = _index_transcript(index, path, config["tools"])
+            except OSError as e:
+                debug_log(f"Sub-agent transcript read error: {e}")
+                continue
+            context = scan.turns[-1][3] if scan.turns else 0
+            if not scan.turns and index is not None:
+                import sqlite3
+
+                try:
+                    row = index.execute(
+                        "SELECT input_tokens FROM turns WHERE path = ?"
+                        " ORDER BY offset DESC LIMIT 1",
+                        (path,),
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    debug_log(f"Sub-agent index query failed: {e}")
+                    row = None
+                context = row[0] if row else 0
+            agents.append((mtime, context))
+    finally:
+        if index is not None:
+            index.close()
+    return agents
+
+
+def extract_sub_agents_info(data: dict, config: dict) -> dict | None:
+    """Discover and summarise the session's sub-agents (None if there are none)."""
+    return summarise_sub_agent_transcripts(discover_sub_agent_transcripts(data, config), config)
+
+
 # =============================================================================
 # DATA EXTRACTION FUNCTIONS
 # =============================================================================
@@ -789,15 +2968,19 @@ def extract_session_info(data: dict) -> tuple[int, int, int]:
     return elapsed_seconds, total_input, total_output
 
 
-def extract_compaction_info(data: dict, config: dict) -> tuple[bool, int, int]:
+def extract_compaction_info(
+    data: dict, config: dict
+) -> tuple[bool, int, int, dict[str, Any] | None]:
     """
     Detect compaction by comparing current context to previous.
-    Returns: (compaction_detected, from_tokens, to_tokens)
+    Returns: (compaction_detected, from_tokens, to_tokens, summary), where
+    summary is the session's compaction count, average tokens reclaimed and
+    seconds since the last one (None before the first logged compaction).
     """
     current_usage = safe_get(data, "context_window", "current_usage")
 
     if not current_usage:
-        return False, 0, 0
+        return False, 0, 0, None
 
     # Calculate current context size
     input_tokens = safe_get(current_usage, "input_tokens", default=0)
@@ -806,7 +2989,65 @@ def extract_compaction_info(data: dict, config: dict) -> tuple[bool, int, int]:
     current_context = input_tokens + cache_creation + cache_read
 
     # Load previous state
-    state = load_state(config)
+    store = _open_state_store(config, _state_session_key(data))
+    try:
+        state = load_state(config, store)
+        loaded = dict(state)
+        compaction_detected, from_tokens, to_tokens = _update_compaction_state(
+            state, current_context, config
+        )
+        if compaction_detected and store is not None:
+            model = safe_get(data, "model", "display_name") or safe_get(data, "model", "id")
+            state["last_event"] = _append_compaction_event(store, state, str(model or ""))
+        # Most refreshes leave the context size unchanged (no new turn yet):
+        # skip the write then, unless the record is due to be refreshed
+        if state != loaded or _state_record_stale(store):
+            save_state(config, state, store)
+        else:
+            profile_count("state.saves_skipped")
+            debug_log("Compaction state unchanged, skipping save")
+    finally:
+        if store is not None:
+            store.close()
+
+    # If we detected compaction this round OR we have recent compaction data
+    if compaction_detected or (from_tokens > 0 and to_tokens > 0):
+        return True, from_tokens, to_tokens, _compaction_summary(state)
+
+    return False, 0, 0, None
+
+
+def _compaction_summary(state: dict[str, Any]) -> dict[str, Any] | None:
+    """Summarise the session's compactions from the running totals in state."""
+    count = state.get("compactions", 0)
+    if count <= 0:
+        return None
+    import time
+
+    return {
+        "count": count,
+        "average_reclaimed": state.get("reclaimed_tokens", 0) // count,
+        "since_seconds": max(0, int(time.time() - state.get("last_compaction_at", 0.0))),
+    }
+
+
+def _state_record_stale(store: _StateStore | None) -> bool:
+    """Whether the session's unchanged record should still be rewritten."""
+    if store is None or store.slot is None:
+        return False
+    import time
+
+    return time.time() - store.updated > _STATE_TOUCH_SECONDS
+
+
+def _update_compaction_state(
+    state: dict[str, Any], current_context: int, config: dict
+) -> tuple[bool, int, int]:
+    """Record the current context in state, detecting a compaction.
+
+    Returns: (compaction_detected, from_tokens, to_tokens) for the last
+    known compaction.
+    """
     previous_context = state.get("previous_context_tokens", 0)
     threshold = config["compaction"]["detection_threshold"]
 
@@ -822,17 +3063,16 @@ def extract_compaction_info(data: dict, config: dict) -> tuple[bool, int, int]:
         to_tokens = current_context
         state["last_compaction_from"] = from_tokens
         state["last_compaction_to"] = to_tokens
+        state["compactions"] = state.get("compactions", 0) + 1
+        state["reclaimed_tokens"] = state.get("reclaimed_tokens", 0) + from_tokens - to_tokens
+        import time
+
+        state["last_compaction_at"] = time.time()
         debug_log(f"Compaction detected: {from_tokens} -> {to_tokens}")
 
     # Update state with current context
     state["previous_context_tokens"] = current_context
-    save_state(config, state)
-
-    # If we detected compaction this round OR we have recent compaction data
-    if compaction_detected or (from_tokens > 0 and to_tokens > 0):
-        return True, from_tokens, to_tokens
-
-    return False, 0, 0
+    return compaction_detected, from_tokens, to_tokens
 
 
 def extract_workspace_info(data: dict, config: dict) -> str:
@@ -845,10 +3085,7 @@ def extract_workspace_info(data: dict, config: dict) -> str:
     dir_config = config["directory"]
 
     if dir_config["abbreviate_home"]:
-        try:
-            home = str(Path.home())
-        except (RuntimeError, KeyError, OSError):
-            home = ""
+        home = _home_dir()
         if home and current_dir.startswith(home):
             current_dir = "~" + current_dir[len(home) :]
 
@@ -883,53 +3120,254 @@ def extract_tools_info(data: dict, config: dict) -> list[tuple[str, int]]:
 
 
 def get_git_info(data: dict, config: dict) -> tuple[str, bool, int] | None:
-    """Get git branch, status, and uncommitted file count."""
+    """Get git branch, status, and uncommitted file count.
+
+    The branch is read directly from the repository's HEAD file; git itself
+    only runs for the dirty status. When neither show_status nor
+    show_uncommitted_count is enabled, no subprocess runs at all and the
+    repository is reported as clean.
+
+    Status results are cached per repository and reused while the stat
+    signatures of HEAD, the index and the work tree root are unchanged, so
+    an idle repository costs a few stat() calls instead of a `git status` run.
+    """
     git_config = config["git"]
-    timeout = config["advanced"]["git_timeout"]
 
     cwd = safe_get(data, "workspace", "current_dir") or safe_get(data, "cwd")
     if not cwd:
         return None
 
-    try:
-        result = subprocess.run(
-            ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-            cwd=cwd,
-            capture_output=True,
-            encoding="utf-8",
-            errors="replace",
-            timeout=timeout,
-        )
+    repo = _find_git_dir(cwd)
+    branch = _read_git_head(repo[1]) if repo else None
+    needs_status = git_config["show_status"] or git_config["show_uncommitted_count"]
 
-        if result.returncode != 0:
+    if needs_status or branch is None:
+        status = _get_git_status_cached(cwd, config, repo)
+        if status is None:
             return None
+        if branch is None:
+            branch = status["branch"]
+        uncommitted_count = status["uncommitted_count"] if needs_status else 0
+    else:
+        uncommitted_count = 0
+
+    # Sanitize ANSI escape codes from git output to prevent terminal injection
+    branch = _ANSI_ESCAPE_RE.sub("", branch)
+
+    max_len = git_config["max_branch_length"]
+    if len(branch) > max_len:
+        branch = branch[: max_len - 3] + "..."
+
+    is_clean = uncommitted_count == 0
+
+    return branch, is_clean, uncommitted_count
+
+
+def _get_git_status_cached(
+    cwd: str, config: dict, repo: tuple[str, str] | None
+) -> dict[str, Any] | None:
+    """Get parsed git status for cwd, served from the git cache when valid.
+
+    repo is the (work_tree, git_dir) pair from _find_git_dir(), or None when
+    no repository was found (git is then asked directly, uncached).
+    """
+    ttl = config["git"].get("cache_ttl_seconds", 0)
+    if repo is None or ttl <= 0:
+        return _run_git_status(cwd, config)
+
+    import time
 
-        # Sanitize ANSI escape codes from git output to prevent terminal injection
-        branch = _ANSI_ESCAPE_RE.sub("", result.stdout.strip())
+    work_tree, git_dir = repo
+    cache_path = _cache_file_path(config, "git", work_tree)
+    signature = _git_signature(work_tree, git_dir)
+    now = time.time()
 
-        max_len = git_config["max_branch_length"]
-        if len(branch) > max_len:
-            branch = branch[: max_len - 3] + "..."
+    if cache_path is not None:
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+            if (
+                isinstance(cached, dict)
+                and cached.get("root") == work_tree
+                and cached.get("signature") == signature
+                and 0 <= now - cached.get("time", 0) < ttl
+                and isinstance(cached.get("status"), dict)
+            ):
+                debug_log("Using cached git status")
+                profile_count("git.cache_hit")
+                return cached["status"]
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError, TypeError) as e:
+            debug_log(f"Git cache load error: {e}")
+
+    profile_count("git.cache_miss")
+    status = _run_git_status(cwd, config)
+    if status is None or cache_path is None:
+        return status
+
+    # Re-stat after the run: `git status` may refresh the index itself
+    entry = {
+        "root": work_tree,
+        "signature": _git_signature(work_tree, git_dir),
+        "time": now,
+        "status": status,
+    }
+    try:
+        _atomic_write_json(cache_path, entry)
+    except OSError as e:
+        debug_log(f"Git cache save failed: {e}")
+
+    return status
+
+
+@_profiled("git.status")
+def _run_git_status(cwd: str, config: dict) -> dict[str, Any] | None:
+    """Run `git status --porcelain=v2 --branch` in cwd and parse the result."""
+    import subprocess
 
-        result = subprocess.run(
-            ["git", "status", "--porcelain"],
+    timeout = config["advanced"]["git_timeout"]
+
+    try:
+        result = _run_source_command(
+            ["git", "status", "--porcelain=v2", "--branch"],
+            timeout,
             cwd=cwd,
-            capture_output=True,
             encoding="utf-8",
             errors="replace",
-            timeout=timeout,
         )
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
+        debug_log(f"Git error: {e}")
+        return None
 
-        uncommitted_lines = [line for line in result.stdout.strip().split("\n") if line]
-        uncommitted_count = len(uncommitted_lines)
-        is_clean = uncommitted_count == 0
+    if result.returncode != 0:
+        return None
 
-        return branch, is_clean, uncommitted_count
+    return _parse_git_status_v2(result.stdout)
 
-    except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
-        debug_log(f"Git error: {e}")
+
+@_profiled("git.find_dir")
+def _find_git_dir(start: str) -> tuple[str, str] | None:
+    """Locate the work tree root and git dir for a directory, without git.
+
+    Walks up from start to the first `.git` entry. A `.git` file (linked
+    worktrees, submodules) is followed via its `gitdir:` line. Returns
+    (work_tree, git_dir) or None if no repository is found.
+    """
+    current = os.path.abspath(start)
+    while True:
+        dot_git = os.path.join(current, ".git")
+        if os.path.isdir(dot_git):
+            return current, dot_git
+        if os.path.isfile(dot_git):
+            try:
+                with open(dot_git, encoding="utf-8", errors="replace") as f:
+                    first_line = f.readline().strip()
+            except OSError:
+                return None
+            if not first_line.startswith("gitdir:"):
+                return None
+            git_dir = first_line[len("gitdir:") :].strip()
+            git_dir = os.path.normpath(os.path.join(current, git_dir))
+            return (current, git_dir) if os.path.isdir(git_dir) else None
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+@_profiled("git.head")
+def _read_git_head(git_dir: str) -> str | None:
+    """Resolve the current branch name from a git dir's HEAD file.
+
+    Returns the branch for a symbolic ref, the abbreviated commit SHA for a
+    detached HEAD, or None when HEAD cannot be interpreted (e.g. reftable
+    repositories), in which case the caller asks git instead.
+    """
+    try:
+        with open(os.path.join(git_dir, "HEAD"), encoding="utf-8", errors="replace") as f:
+            head = f.readline().strip()
+    except OSError:
         return None
 
+    if head.startswith("ref:"):
+        ref = head[len("ref:") :].strip()
+        if ref.startswith("refs/heads/"):
+            branch = ref[len("refs/heads/") :]
+            # Reftable repos point HEAD at a placeholder ref
+            return branch if branch and branch != ".invalid" else None
+        return ref or None
+
+    # Detached HEAD holds the commit id itself (SHA-1 or SHA-256)
+    if len(head) in (40, 64) and all(c in "0123456789abcdef" for c in head):
+        return head[:7]
+    return None
+
+
+def _git_signature(work_tree: str, git_dir: str) -> list[Any]:
+    """Stat signatures of HEAD, the index and the work tree root.
+
+    Each entry is [mtime_ns, size, inode], or None for a missing path
+    (e.g. no index before the first `git add`).
+    """
+    signature: list[Any] = []
+    for path in (
+        os.path.join(git_dir, "HEAD"),
+        os.path.join(git_dir, "index"),
+        work_tree,
+    ):
+        try:
+            st = os.stat(path)
+            signature.append([st.st_mtime_ns, st.st_size, st.st_ino])
+        except OSError:
+            signature.append(None)
+    return signature
+
+
+def _parse_git_status_v2(output: str) -> dict[str, Any]:
+    """Parse `git status --porcelain=v2 --branch` output.
+
+    Returns a dict with branch, oid, upstream (or None), ahead, behind and
+    uncommitted_count. A detached HEAD is reported as branch "HEAD",
+    matching `git rev-parse --abbrev-ref HEAD`.
+    """
+    status: dict[str, Any] = {
+        "branch": "HEAD",
+        "oid": "",
+        "upstream": None,
+        "ahead": 0,
+        "behind": 0,
+        "uncommitted_count": 0,
+    }
+
+    for line in output.splitlines():
+        if not line:
+            continue
+        if not line.startswith("# "):
+            # Changed (1/2), unmerged (u) and untracked (?) entries
+            status["uncommitted_count"] += 1
+            continue
+
+        header, _, value = line[2:].partition(" ")
+        if header == "branch.head":
+            status["branch"] = "HEAD" if value == "(detached)" else value
+        elif header == "branch.oid":
+            status["oid"] = "" if value == "(initial)" else value
+        elif header == "branch.upstream":
+            status["upstream"] = value
+        elif header == "branch.ab":
+            for part in value.split():
+                try:
+                    count = abs(int(part))
+                except ValueError:
+                    continue
+                if part.startswith("+"):
+                    status["ahead"] = count
+                elif part.startswith("-"):
+                    status["behind"] = count
+
+    return status
+
 
 # =============================================================================
 # FORMATTING FUNCTIONS
@@ -1009,6 +3447,7 @@ def get_threshold_color(
 # =============================================================================
 
 
+@_profiled("segment.model")
 def build_model_segment(data: dict, config: dict) -> str:
     """Build the model display segment."""
     display_name, tier = extract_model_info(data)
@@ -1041,6 +3480,7 @@ def _jerry_tier_to_color(tier: str, colors: dict) -> int:
     return colors["green"]
 
 
+@_profiled("segment.context")
 def build_context_segment(data: dict, config: dict, jerry_data: dict | None = None) -> str:
     """Build the context window usage segment.
 
@@ -1074,6 +3514,7 @@ def build_context_segment(data: dict, config: dict, jerry_data: dict | None = No
     return f"{icon}{estimate_marker}{bar}"
 
 
+@_profiled("segment.cost")
 def build_cost_segment(data: dict, config: dict) -> str:
     """Build the cost display segment with configurable currency."""
     cost, _ = extract_cost_info(data)
@@ -1092,6 +3533,7 @@ def build_cost_segment(data: dict, config: dict) -> str:
     return f"{icon}{color}{currency}{cost:.2f}{reset}"
 
 
+@_profiled("segment.tokens")
 def build_tokens_segment(data: dict, config: dict) -> str:
     """
     Build the token breakdown segment.
@@ -1115,6 +3557,7 @@ def build_tokens_segment(data: dict, config: dict) -> str:
     return f"{icon}{fresh_color}{fresh_str}{fresh_indicator}{reset} {cached_color}{cached_str}{cached_indicator}{reset}"
 
 
+@_profiled("segment.session")
 def build_session_segment(data: dict, config: dict) -> str:
     """
     Build the session segment showing duration + total tokens consumed.
@@ -1135,13 +3578,15 @@ def build_session_segment(data: dict, config: dict) -> str:
     return f"{icon}{color}{duration_str} {tokens_str}tok{reset}"
 
 
+@_profiled("segment.compaction")
 def build_compaction_segment(data: dict, config: dict, jerry_data: dict | None = None) -> str:
     """Build the compaction indicator segment.
 
     Uses Jerry's compaction detection when available, falling back
     to standalone state-file-based detection.
-    Format: 📉 150k→46k
+    Format: 📉 150k→46k, plus ×3 avg -98.0k 12m ago with standalone detection
     """
+    summary = None
     # Use Jerry data if available (ST-005)
     jerry_compaction = safe_get(jerry_data, "compaction") if jerry_data else None
     if jerry_compaction and isinstance(jerry_compaction, dict):
@@ -1150,7 +3595,7 @@ def build_compaction_segment(data: dict, config: dict, jerry_data: dict | None =
         to_tokens = jerry_compaction.get("to_tokens", 0)
     else:
         # Fallback: standalone compaction detection
-        compacted, from_tokens, to_tokens = extract_compaction_info(data, config)
+        compacted, from_tokens, to_tokens, summary = extract_compaction_info(data, config)
 
     if not compacted:
         return ""
@@ -1165,14 +3610,24 @@ def build_compaction_segment(data: dict, config: dict, jerry_data: dict | None =
     from_str = format_tokens_short(from_tokens)
     to_str = format_tokens_short(to_tokens)
 
-    return f"{icon}{color}{from_str}{arrow}{to_str}{reset}"
+    details = ""
+    if summary and config["compaction"].get("show_summary", True):
+        times = "×" if use_emoji else "x"
+        details = f" {times}{summary['count']}"
+        if summary["count"] > 1:
+            details += f" avg -{format_tokens_short(summary['average_reclaimed'])}"
+        details += f" {format_duration(summary['since_seconds'])} ago"
 
+    return f"{icon}{color}{from_str}{arrow}{to_str}{details}{reset}"
 
+
+@_profiled("segment.sub_agents")
 def build_sub_agents_segment(jerry_data: dict | None, config: dict) -> str:
     """Build the sub-agents summary segment from Jerry data.
 
     Shows active/completed agent counts and total context usage.
-    Only displayed when Jerry data is available and agents exist.
+    Only displayed when jerry_data (Jerry's, or the same shape from
+    extract_sub_agents_info) has agents.
     Format: 🤖 2↑14↓ 892k ctx
     """
     if jerry_data is None:
@@ -1204,12 +3659,19 @@ def build_sub_agents_segment(jerry_data: dict | None, config: dict) -> str:
     return f"{icon}{color}{completed}↓{ctx_part}{reset}"
 
 
-def build_tools_segment(data: dict, config: dict) -> str:
-    """Build the dominant tools segment."""
+@_profiled("segment.tools")
+def build_tools_segment(data: dict, config: dict, sources: dict | None = None) -> str:
+    """Build the dominant tools segment.
+
+    Uses sources["tools"] when it was prefetched, otherwise parses inline.
+    """
     if not config["tools"]["enabled"]:
         return ""
 
-    tools = extract_tools_info(data, config)
+    if sources is not None and "tools" in sources:
+        tools = sources["tools"]
+    else:
+        tools = extract_tools_info(data, config)
 
     if not tools:
         return ""
@@ -1225,9 +3687,16 @@ def build_tools_segment(data: dict, config: dict) -> str:
     return f"{icon}{color}{tools_display}{reset}"
 
 
-def build_git_segment(data: dict, config: dict) -> str:
-    """Build the git status segment."""
-    git_info = get_git_info(data, config)
+@_profiled("segment.git")
+def build_git_segment(data: dict, config: dict, sources: dict | None = None) -> str:
+    """Build the git status segment.
+
+    Uses sources["git"] when it was prefetched, otherwise queries git inline.
+    """
+    if sources is not None and "git" in sources:
+        git_info = sources["git"]
+    else:
+        git_info = get_git_info(data, config)
 
     if git_info is None:
         return ""
@@ -1257,6 +3726,7 @@ def build_git_segment(data: dict, config: dict) -> str:
     return f"{icon}{color}{branch} {status_icon}{reset}".strip()
 
 
+@_profiled("segment.directory")
 def build_directory_segment(data: dict, config: dict) -> str:
     """Build the directory display segment."""
     directory = extract_workspace_info(data, config)
@@ -1274,17 +3744,17 @@ def build_directory_segment(data: dict, config: dict) -> str:
 # =============================================================================
 
 
-def build_status_line(data: dict, config: dict, jerry_data: dict | None = None) -> str:
-    """Build the complete status line from all segments.
+def _mark_stale(segment: str, config: dict, is_stale: bool) -> str:
+    """Append the stale marker to a segment rendered from a remembered value."""
+    if not is_stale:
+        return segment
+    marker = "⏳" if config["display"]["use_emoji"] else "(stale)"
+    return f"{segment} {marker}"
 
-    When jerry_data is available (FEAT-002), uses Jerry's domain
-    computation for context/compaction/sub-agent segments. All other
-    segments use the raw Claude Code data.
-    """
-    segments_config = config["segments"]
+
+def _use_compact_mode(config: dict) -> bool:
+    """Decide whether to render in compact mode (configured or auto)."""
     display_config = config["display"]
-    separator = display_config["separator"]
-    colors = config["colors"]
 
     compact = display_config["compact_mode"]
     if not compact and display_config["auto_compact_width"] > 0:
@@ -1295,13 +3765,42 @@ def build_status_line(data: dict, config: dict, jerry_data: dict | None = None)
         if term_width > 0 and term_width < display_config["auto_compact_width"]:
             compact = True
 
+    return compact
+
+
+@_profiled("status_line.build")
+def build_status_line(
+    data: dict,
+    config: dict,
+    jerry_data: dict | None = None,
+    sources: dict | None = None,
+) -> str:
+    """Build the complete status line from all segments.
+
+    When jerry_data is available (FEAT-002), uses Jerry's domain
+    computation for context/compaction/sub-agent segments. All other
+    segments use the raw Claude Code data.
+
+    sources holds results already fetched by gather_sources() ("git",
+    "tools"); any source missing from it is computed inline.
+    """
+    segments_config = config["segments"]
+    display_config = config["display"]
+    separator = display_config["separator"]
+    colors = config["colors"]
+
+    compact = _use_compact_mode(config)
+    stale = sources.get("stale", ()) if sources else ()
+    jerry_stale = jerry_data is not None and "jerry" in stale
+
     segments = []
 
     if segments_config["model"]:
         segments.append(build_model_segment(data, config))
 
     if segments_config["context"]:
-        segments.append(build_context_segment(data, config, jerry_data=jerry_data))
+        context_segment = build_context_segment(data, config, jerry_data=jerry_data)
+        segments.append(_mark_stale(context_segment, config, jerry_stale))
 
     if segments_config["cost"]:
         segments.append(build_cost_segment(data, config))
@@ -1313,27 +3812,37 @@ def build_status_line(data: dict, config: dict, jerry_data: dict | None = None)
         if segments_config["session"]:
             segments.append(build_session_segment(data, config))
 
-        # Sub-agents segment (Jerry-only, FEAT-002) — before compaction/tools
-        # so it isn't pushed off-screen by long tool breakdowns
-        if jerry_data:
+        # Sub-agents segment (FEAT-002) — before compaction/tools so it isn't
+        # pushed off-screen by long tool breakdowns. Jerry's view wins; without
+        # it the sub-agent transcripts are summarised directly (opt-in).
+        if segments_config.get("sub_agents", True):
             sub_agents_segment = build_sub_agents_segment(jerry_data, config)
+            sub_agents_stale = jerry_stale
+            if not sub_agents_segment and config["sub_agents"]["enabled"]:
+                if sources is not None:
+                    summary = sources.get("sub_agents")
+                else:
+                    summary = extract_sub_agents_info(data, config)
+                sub_agents_segment = build_sub_agents_segment({"sub_agents": summary}, config)
+                sub_agents_stale = "sub_agents" in stale
             if sub_agents_segment:
-                segments.append(sub_agents_segment)
+                segments.append(_mark_stale(sub_agents_segment, config, sub_agents_stale))
 
         if segments_config.get("compaction", True):
             compaction_segment = build_compaction_segment(data, config, jerry_data=jerry_data)
             if compaction_segment:
-                segments.append(compaction_segment)
+                from_jerry = jerry_stale and bool(safe_get(jerry_data, "compaction"))
+                segments.append(_mark_stale(compaction_segment, config, from_jerry))
 
         if segments_config["tools"]:
-            tools_segment = build_tools_segment(data, config)
+            tools_segment = build_tools_segment(data, config, sources=sources)
             if tools_segment:
-                segments.append(tools_segment)
+                segments.append(_mark_stale(tools_segment, config, "tools" in stale))
 
     if segments_config["git"]:
-        git_segment = build_git_segment(data, config)
+        git_segment = build_git_segment(data, config, sources=sources)
         if git_segment:
-            segments.append(git_segment)
+            segments.append(_mark_stale(git_segment, config, "git" in stale))
 
     if segments_config["directory"] and not compact:
         segments.append(build_directory_segment(data, config))
@@ -1346,42 +3855,679 @@ def build_status_line(data: dict, config: dict, jerry_data: dict | None = None)
 
 
 # =============================================================================
-# ENTRY POINT
+# CONCURRENT DATA SOURCES
 # =============================================================================
 
 
-def main() -> None:
-    """Main entry point."""
-    configure_windows_console()
+class _BackgroundTask:
+    """Run a function on a daemon thread and hand back its result.
+
+    Daemon threads (rather than concurrent.futures) are used so that an
+    unfinished task can never hold up interpreter exit.
+    """
+
+    def __init__(self, name: str, func: Any, *args: Any) -> None:
+        import threading
+
+        self.name = name
+        self._func = func
+        self._args = args
+        self._result: Any = None
+        self._error: BaseException | None = None
+        # Carry the caller's context (e.g. the active profile) into the thread
+        self._context = contextvars.copy_context()
+        self._thread = threading.Thread(target=self._run, name=f"ecw-{name}", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            self._result = self._context.run(self._func, *self._args)
+        except Exception as e:
+            self._error = e
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait for the task; returns True if it has finished."""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def result(self) -> Any:
+        """Return the task's result, re-raising any exception it raised."""
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def gather_sources(
+    input_json: str, data: dict, config: dict
+) -> tuple[dict[str, Any] | None, dict[str, Any]]:
+    """Fetch the expensive, independent data sources concurrently.
+
+    The Jerry subprocess, the git status call and transcript parsing do not
+    depend on each other, so they run in parallel and the wall time becomes
+    the slowest of them rather than their sum. The last source runs on the
+    calling thread; a single source runs inline with no threads at all.
+
+    With advanced.latency_budget_ms set, every source runs in the background
+    and is waited on only until the deadline. A source that misses it falls
+    back to its last remembered value and is listed in sources["stale"];
+    with nothing remembered its segment is omitted (Jerry falls back to
+    standalone computation).
+
+    Returns (jerry_data, sources) where sources feeds build_status_line().
+    """
+    jobs = _source_jobs(input_json, data, config)
+    budget_ms = config["advanced"].get("latency_budget_ms", 0)
+    if budget_ms and budget_ms > 0 and jobs:
+        return _gather_sources_with_budget(jobs, input_json, data, config, budget_ms / 1000.0)
+
+    results: dict[str, Any] = {}
+    if jobs:
+        background = [_BackgroundTask(name, func, *args) for name, func, args in jobs[:-1]]
+        name, func, args = jobs[-1]
+        results[name] = func(*args)
+        for task in background:
+            task.join()
+            results[task.name] = task.result()
+
+    jerry_data = results.pop("jerry", None)
+    return jerry_data, results
+
+
+def _source_jobs(input_json: str, data: dict, config: dict) -> list[tuple[str, Any, tuple]]:
+    """(name, function, args) of each data source the config enables."""
+    segments_config = config["segments"]
+    jobs: list[tuple[str, Any, tuple]] = []
+
+    if config.get("jerry", {}).get("enabled", True):
+        jobs.append(("jerry", try_jerry_estimate, (input_json, config, data)))
+    if segments_config["git"]:
+        jobs.append(("git", get_git_info, (data, config)))
+    if segments_config["tools"] and config["tools"]["enabled"] and not _use_compact_mode(config):
+        jobs.append(("tools", extract_tools_info, (data, config)))
+    if (
+        segments_config.get("sub_agents", True)
+        and config["sub_agents"]["enabled"]
+        and not _use_compact_mode(config)
+    ):
+        # Discovery runs in the job too, so it counts against the budget
+        jobs.append(("sub_agents", extract_sub_agents_info, (data, config)))
+    return jobs
+
+
+def _gather_sources_with_budget(
+    jobs: list[tuple[str, Any, tuple]],
+    input_json: str,
+    data: dict,
+    config: dict,
+    budget: float,
+) -> tuple[dict[str, Any] | None, dict[str, Any]]:
+    """Run all jobs in the background and collect what finishes by the deadline.
+
+    Every task remembers its own value when it finishes, so a source that
+    misses the deadline still leaves a value for the next refresh. Only one
+    fetch per (source, key) runs at a time: the daemon reuses its in-flight
+    task, and a source already being fetched by another process is rendered
+    from its remembered value. Unfinished tasks are not waited on here: a
+    one-shot run hands them off after writing its output (see
+    finish_abandoned_sources), the daemon simply lets them run.
+    """
+    import time
+
+    deadline = time.monotonic() + budget
+    if not _long_running:
+        _sources_abandonable.set(True)
+    tasks = [
+        _start_source(name, _source_cache_key(name, data), config, func, args)
+        for name, func, args in jobs
+    ]
+
+    results: dict[str, Any] = {}
+    stale: set[str] = set()
+    for task in tasks:
+        key = _source_cache_key(task.name, data)
+        finished = task.join(max(0.0, deadline - time.monotonic()))
+        value = task.result() if finished else None
+        if value is _SOURCE_BUSY:
+            debug_log(f"Source {task.name} is being fetched by another process")
+        elif not finished or value is _SOURCE_DEFERRED:
+            debug_log(f"Source {task.name} missed the {int(budget * 1000)}ms latency budget")
+            if not _long_running:
+                _abandoned_sources[task.name] = (config, input_json)
+        else:
+            results[task.name] = value
+            continue
+        value = _recall_source(config, task.name, key)
+        if value is not None:
+            results[task.name] = value
+            stale.add(task.name)
+        else:
+            results[task.name] = [] if task.name == "tools" else None
+
+    results["stale"] = stale
+    jerry_data = results.pop("jerry", None)
+    return jerry_data, results
+
+
+# Returned by a source that another process is already fetching
+_SOURCE_BUSY = object()
+
+# Returned by a source that left its work to the hand-off (_IngestDeferred)
+_SOURCE_DEFERRED = object()
+
+# Sources a one-shot run stopped waiting for, with the config and input they
+# were fetched with
+_abandoned_sources: dict[str, tuple[dict, str]] = {}
+
+# The daemon's unfinished fetches per (source, key), reused by later
+# refreshes; guarded by _in_flight_lock (set up by run_daemon)
+_in_flight_sources: dict[tuple[str, str], _BackgroundTask] = {}
+_in_flight_lock: Any = None
+
+
+def _start_source(name: str, key: str, config: dict, func: Any, args: tuple) -> _BackgroundTask:
+    """Start fetching a source, or reuse the daemon's fetch still in flight."""
+    if _in_flight_lock is None:
+        return _BackgroundTask(name, _run_remembered, name, key, config, func, args)
+    with _in_flight_lock:
+        task = _in_flight_sources.get((name, key))
+        if task is None or task.join(0):
+            task = _BackgroundTask(name, _run_remembered, name, key, config, func, args)
+            _in_flight_sources[(name, key)] = task
+        return task
+
+
+def _run_remembered(name: str, key: str, config: dict, func: Any, args: tuple) -> Any:
+    """Run a source under its lock and remember its value.
+
+    The value is remembered even if nothing waits for it any more. Returns
+    _SOURCE_BUSY, without running, while another process holds the lock, and
+    _SOURCE_DEFERRED if the source left its work to the hand-off.
+    """
     try:
-        config = load_config()
+        lock_fd = _lock_source(config, name, key)
+    except OSError:
+        return _SOURCE_BUSY
+    try:
+        value = func(*args)
+        _remember_source(config, name, key, value)
+        return value
+    except _IngestDeferred as e:
+        debug_log(f"Cold ingest of {e} left to the hand-off")
+        return _SOURCE_DEFERRED
+    finally:
+        if lock_fd is not None:
+            os.close(lock_fd)
+
+
+def _lock_source(config: dict, name: str, key: str) -> int | None:
+    """Take the lock on fetching a source, without blocking.
+
+    Returns the locked fd (closing it releases the lock), or None without a
+    usable cache dir. Raises OSError if the lock is held elsewhere. The lock
+    is per open file, so it also excludes other threads of this process.
+    """
+    cache_path = _cache_file_path(config, f"busy-{name}", key)
+    if cache_path is None:
+        return None
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        fd = os.open(os.path.splitext(cache_path)[0] + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+    except OSError as e:
+        debug_log(f"Source lock unavailable for {name}: {e}")
+        return None
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        raise
+    return fd
+
+
+# Source subprocesses (git, Jerry) still running, so a one-shot run can end
+# them before handing their sources off
+_source_processes: set[Any] = set()
+
+
+def _run_source_command(
+    cmd: list[str], timeout: float, input: str | None = None, **kwargs: Any
+) -> Any:
+    """Like subprocess.run(capture_output=True), ending the process on hand-off."""
+    import subprocess
 
+    stdin = subprocess.PIPE if input is not None else None
+    with subprocess.Popen(
+        cmd, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs
+    ) as process:
+        _source_processes.add(process)
+        try:
+            stdout, stderr = process.communicate(input, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
+        finally:
+            _source_processes.discard(process)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+def finish_abandoned_sources() -> None:
+    """Hand sources that missed the latency budget to a detached process.
+
+    A source that is always slower than the budget would otherwise die with
+    the process on every refresh and never leave a value (or index, or git
+    cache) behind. Waiting for it here would hold up whoever runs the status
+    line, so its subprocesses are ended instead and a detached
+    `--finish-sources` process fetches it again and remembers the result.
+    """
+    if not _abandoned_sources:
+        return
+    import subprocess
+
+    for process in list(_source_processes):
+        # terminate, not kill: git removes its index.lock on SIGTERM
+        process.terminate()
+
+    names = sorted(_abandoned_sources)
+    config, input_json = _abandoned_sources[names[0]]
+    _abandoned_sources.clear()
+    env = {k: v for k, v in os.environ.items() if k != "ECW_PROFILE"}
+    if sys.platform == "win32":
+        detach = {
+            "creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        }
+    else:
+        detach = {"start_new_session": True}
+    try:
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--finish-sources=" + ",".join(names)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            **detach,
+        )
+        with process.stdin:
+            process.stdin.write((json.dumps(config) + "\n" + input_json).encode("utf-8"))
+    except (OSError, ValueError) as e:
+        debug_log(f"Could not hand off sources {names}: {e}")
+
+
+def run_finish_sources(names: list[str]) -> None:
+    """Fetch the sources a refresh handed off and remember their values.
+
+    Started detached by finish_abandoned_sources(), which writes the
+    refresh's config (one JSON line) and input to stdin. A source another
+    process is already fetching is skipped.
+    """
+    try:
+        config = json.loads(sys.stdin.readline())
         if config["advanced"]["debug"]:
             os.environ["ECW_DEBUG"] = "1"
+        input_json = sys.stdin.read()
+        data = json.loads(input_json)
+        tasks = [
+            _BackgroundTask(
+                name, _run_remembered, name, _source_cache_key(name, data), config, func, args
+            )
+            for name, func, args in _source_jobs(input_json, data, config)
+            if name in names
+        ]
+        for task in tasks:
+            task.join()
+    except Exception as e:
+        debug_log(f"Finishing sources {names} failed: {e}")
 
-        input_data = sys.stdin.read().strip()
 
-        if not input_data:
-            debug_log("No input received")
-            print("ECW: No data")
-            return
+# Last value written per (source, key), so unchanged values are not rewritten
+_remembered_sources: dict[tuple[str, str], Any] = {}
 
-        try:
+
+def _source_cache_key(name: str, data: dict) -> str:
+    """Identify what a source's value belongs to (repo dir, transcript, session)."""
+    if name == "git":
+        return safe_get(data, "workspace", "current_dir") or safe_get(data, "cwd", default="")
+    if name == "tools":
+        return safe_get(data, "transcript_path", default="")
+    return safe_get(data, "session_id", default="") or safe_get(data, "transcript_path", default="")
+
+
+def _remember_source(config: dict, name: str, key: str, value: Any) -> None:
+    """Persist a source's latest value for use when a later run misses the budget."""
+    if value is None or value == [] or _remembered_sources.get((name, key)) == value:
+        return
+    cache_path = _cache_file_path(config, f"last-{name}", key)
+    if cache_path is None:
+        return
+    try:
+        _atomic_write_json(cache_path, {"key": key, "value": value})
+        _remembered_sources[(name, key)] = value
+    except OSError as e:
+        debug_log(f"Source cache save failed for {name}: {e}")
+
+
+def _recall_source(config: dict, name: str, key: str) -> Any:
+    """Load a source's last remembered value, or None if there is none."""
+    if (name, key) in _remembered_sources:
+        return _remembered_sources[(name, key)]
+    cache_path = _cache_file_path(config, f"last-{name}", key)
+    if cache_path is None:
+        return None
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(entry, dict) or entry.get("key") != key:
+        return None
+    value = entry.get("value")
+    # JSON turns tuples into lists; restore the shapes the builders expect
+    if name == "git":
+        return tuple(value) if isinstance(value, list) and len(value) == 3 else None
+    if name == "tools":
+        if not isinstance(value, list):
+            return None
+        return [tuple(item) for item in value if isinstance(item, list) and len(item) == 2]
+    return value if isinstance(value, dict) else None
+
+
+# =============================================================================
+# DAEMON MODE
+# =============================================================================
+
+# Upper bound on a single request payload accepted by the daemon
+_DAEMON_MAX_REQUEST_BYTES = 4 * 1024 * 1024
+
+# How long the client waits for a daemon response before rendering in-process
+_DAEMON_CLIENT_TIMEOUT = 10.0
+
+# A request starts with this and a JSON object of the client's
+# _CLIENT_ENV_VARS on one line, followed by the payload
+_DAEMON_ENV_PREFIX = b"#ecw-env "
+
+
+def render_status_line(input_data: str, config: dict) -> str:
+    """Render the status line for one raw stdin payload.
+
+    Shared by the one-shot entry point, the daemon request handler and the
+    client's in-process fallback so all three produce identical output.
+    """
+    input_data = input_data.strip()
+
+    if not input_data:
+        debug_log("No input received")
+        return "ECW: No data"
+
+    try:
+        with profile_stage("stdin.parse"):
             data = json.loads(input_data)
-        except json.JSONDecodeError as e:
-            debug_log(f"JSON parse error: {e}")
-            print("ECW: Parse error")
+    except json.JSONDecodeError as e:
+        debug_log(f"JSON parse error: {e}")
+        return "ECW: Parse error"
+
+    # FEAT-002: Jerry runs alongside git and transcript parsing
+    jerry_data, sources = gather_sources(input_data, data, config)
+
+    return build_status_line(data, config, jerry_data=jerry_data, sources=sources)
+
+
+def _get_daemon_socket_path() -> str | None:
+    """Resolve the daemon's Unix socket path.
+
+    ECW_DAEMON_SOCKET overrides the default ~/.claude/ecw-statusline.sock.
+    Returns None if HOME is unavailable and no override is set.
+    """
+    override = os.environ.get("ECW_DAEMON_SOCKET", "")
+    if override:
+        return override
+    home = _home_dir()
+    return os.path.join(home, ".claude", "ecw-statusline.sock") if home is not None else None
+
+
+@_profiled("daemon.request")
+def _request_daemon(payload: str, socket_path: str, timeout: float) -> str | None:
+    """Send a payload to a running daemon and return its rendered status line.
+
+    Returns None when no daemon is listening or the exchange fails, so the
+    caller can fall back to in-process rendering.
+    """
+    import socket
+
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            client_env = {name: os.environ[name] for name in _CLIENT_ENV_VARS if name in os.environ}
+            sock.sendall(_DAEMON_ENV_PREFIX + json.dumps(client_env).encode("utf-8") + b"\n")
+            sock.sendall(payload.encode("utf-8"))
+            sock.shutdown(socket.SHUT_WR)
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    except OSError as e:
+        debug_log(f"Daemon request failed: {e}")
+        return None
+
+    response = b"".join(chunks).decode("utf-8", errors="replace")
+    return response or None
+
+
+def _split_daemon_request(request: bytes) -> tuple[dict[str, str] | None, bytes]:
+    """Split a daemon request into the client's environment and the payload.
+
+    The environment is None for a request without one (an older client):
+    the daemon's own environment is used then.
+    """
+    if not request.startswith(_DAEMON_ENV_PREFIX):
+        return None, request
+    header, _, payload = request[len(_DAEMON_ENV_PREFIX) :].partition(b"\n")
+    try:
+        client_env = json.loads(header)
+    except ValueError:
+        return None, payload
+    if not isinstance(client_env, dict):
+        return None, payload
+    return {
+        name: value
+        for name, value in client_env.items()
+        if name in _CLIENT_ENV_VARS and isinstance(value, str)
+    }, payload
+
+
+def run_client() -> None:
+    """Forward stdin to the daemon and print its response.
+
+    Falls back to rendering in-process when the socket is missing, stale or
+    unresponsive, so a stopped daemon never blanks the status line.
+    """
+    profile = start_profile("client")
+    try:
+        with profile_stage("stdin.read"):
+            input_data = sys.stdin.read()
+        socket_path = _get_daemon_socket_path()
+        if socket_path:
+            response = _request_daemon(input_data, socket_path, _DAEMON_CLIENT_TIMEOUT)
+            if response is not None:
+                print(response)
+                return
+        debug_log("Daemon unavailable, rendering in-process")
+
+        config = load_config()
+        if config["advanced"]["debug"]:
+            os.environ["ECW_DEBUG"] = "1"
+        print(render_status_line(input_data, config))
+
+    except Exception as e:
+        debug_log(f"Unexpected error: {e}")
+        print(f"ECW: Error - {type(e).__name__}")
+    finally:
+        finish_profile(profile)
+    finish_abandoned_sources()
+
+
+def run_daemon() -> int:
+    """Serve status line requests over a Unix socket until terminated.
+
+    The config is reloaded only when a config file changes, and the
+    process-level caches (transcript parsing, etc.) and optional Jerry
+    worker stay warm across requests. A stale
+    socket left by a crashed daemon is replaced; a live one makes this call
+    exit with status 1.
+    """
+    import signal
+    import socket
+    import socketserver
+    import threading
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("ECW: daemon mode requires Unix domain sockets", file=sys.stderr)
+        return 1
+
+    socket_path = _get_daemon_socket_path()
+    if socket_path is None:
+        print("ECW: cannot resolve daemon socket path", file=sys.stderr)
+        return 1
+
+    global _long_running, _in_flight_lock
+    _long_running = True
+    _in_flight_lock = threading.Lock()
+
+    loaded = {"config": load_config(), "signature": _config_signature()}
+    if loaded["config"]["advanced"]["debug"]:
+        os.environ["ECW_DEBUG"] = "1"
+
+    def current_config() -> dict[str, Any]:
+        """The loaded config, reloaded first if any config file changed."""
+        signature = _config_signature()
+        if signature != loaded["signature"]:
+            debug_log("Config changed, reloading")
+            loaded["config"] = load_config()
+            loaded["signature"] = signature
+        return loaded["config"]
+
+    if os.path.lexists(socket_path):
+        import stat
+
+        if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+            print(f"ECW: {socket_path} exists and is not a socket", file=sys.stderr)
+            return 1
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(socket_path)
+            print(f"ECW: daemon already running on {socket_path}", file=sys.stderr)
+            return 1
+        except OSError:
+            debug_log(f"Removing stale daemon socket: {socket_path}")
+            os.unlink(socket_path)
+
+    class _RequestHandler(socketserver.StreamRequestHandler):
+        timeout = _DAEMON_CLIENT_TIMEOUT
+
+        def handle(self) -> None:
+            profile = start_profile("daemon")
+            try:
+                payload = self.rfile.read(_DAEMON_MAX_REQUEST_BYTES + 1)
+                client_env, payload = _split_daemon_request(payload)
+                if len(payload) > _DAEMON_MAX_REQUEST_BYTES:
+                    response = "ECW: Error - RequestTooLarge"
+                else:
+                    _client_env.set(client_env)
+                    response = render_status_line(
+                        payload.decode("utf-8", errors="replace"), current_config()
+                    )
+            except Exception as e:
+                debug_log(f"Daemon request error: {e}")
+                response = f"ECW: Error - {type(e).__name__}"
+            finally:
+                finish_profile(profile)
+            self.wfile.write(response.encode("utf-8"))
+
+    # Create the socket owner-only: payloads include paths and session data
+    old_umask = os.umask(0o177)
+    try:
+        server = socketserver.ThreadingUnixStreamServer(socket_path, _RequestHandler)
+    finally:
+        os.umask(old_umask)
+    server.daemon_threads = True
+
+    # Turn SIGTERM into a normal exit so the socket file is cleaned up
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    debug_log(f"Daemon listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for worker in list(_jerry_workers.values()):
+            worker.stop()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+    return 0
+
+
+# =============================================================================
+# ENTRY POINT
+# =============================================================================
+
+
+def main() -> None:
+    """Main entry point.
+
+    Modes:
+        (default)  Render one status line from stdin in-process.
+        --daemon   Serve requests over a Unix socket with warm caches.
+        --client   Forward stdin to the daemon, rendering in-process if absent.
+        --finish-sources=NAMES
+                   (internal) Fetch sources a one-shot run handed off.
+
+    --profile (or ECW_PROFILE=1) adds per-stage timings as JSON on stderr;
+    --profile=PATH (or ECW_PROFILE=PATH) appends them to PATH instead.
+    """
+    configure_windows_console()
+
+    if "--daemon" in sys.argv[1:]:
+        sys.exit(run_daemon())
+    if "--client" in sys.argv[1:]:
+        run_client()
+        return
+    for arg in sys.argv[1:]:
+        if arg.startswith("--finish-sources="):
+            run_finish_sources(arg.split("=", 1)[1].split(","))
             return
 
-        # FEAT-002: Try Jerry for enhanced domain computation
-        jerry_data = try_jerry_estimate(input_data, config, data)
+    profile = start_profile("oneshot")
+    try:
+        config = load_config()
+
+        if config["advanced"]["debug"]:
+            os.environ["ECW_DEBUG"] = "1"
 
-        status_line = build_status_line(data, config, jerry_data=jerry_data)
-        print(status_line)
+        with profile_stage("stdin.read"):
+            input_data = sys.stdin.read()
+        print(render_status_line(input_data, config))
 
     except Exception as e:
         debug_log(f"Unexpected error: {e}")
         print(f"ECW: Error - {type(e).__name__}")
+    finally:
+        finish_profile(profile)
+    finish_abandoned_sources()
 
 
 if __name__ == "__main__":